@@ -0,0 +1,188 @@
+import asyncio
+import json
+import mmap
+import os
+import re
+import struct
+import time
+import zlib
+
+# =========================================
+# Archive compressée des messages bruts des canaux sources
+# =========================================
+#
+# Fichiers dans le dossier d'archive:
+#   segment-000003-000001.seg : blocs zlib concaténés (un bloc = tous les messages d'un jeu, JSON lines)
+#   segment-000003-000001.idx : index binaire (numéro de jeu, offset, longueur) par bloc, mappable en mémoire
+#
+# Le premier numéro est la journée (incrémentée au reset quotidien, quand les numéros
+# de jeu recommencent), le second le segment dans la journée (rotation par taille).
+# Un jeu peut donc avoir des blocs dans plusieurs segments de la même journée.
+#
+# Les messages d'un jeu (création + éditions) restent en mémoire jusqu'à ce que le jeu
+# ne reçoive plus rien pendant `hold_seconds`, puis sont écrits en un seul bloc : lire
+# toutes les éditions du jeu #N demande donc une seule lecture. Une édition arrivée après
+# l'écriture produit un bloc supplémentaire pour le même jeu.
+
+INDEX_RECORD = struct.Struct('<IQI')  # jeu, offset dans le segment, longueur du bloc
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{6})-(\d{6})\.seg$')
+
+class MessageArchive:
+    """Archive des messages Source 1 / Source 2, écrite par lots hors de la boucle asyncio."""
+
+    def __init__(self, directory: str, segment_max_bytes: int, hold_seconds: float):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.hold_seconds = hold_seconds
+        # jeu -> messages en attente d'écriture / dernière réception (time.monotonic)
+        self.pending = {}
+        self.pending_last_seen = {}
+        self.records_written = 0
+        self._flush_lock = asyncio.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        segments = self.segment_ids()
+        # Segment courant : (journée, numéro dans la journée)
+        self.segment_id = segments[-1] if segments else (1, 1)
+
+    def refresh_segment(self):
+        """Reprend sur le dernier segment existant (écrit entre-temps par une autre instance)."""
+        segments = self.segment_ids()
+        self.segment_id = max(segments[-1] if segments else (1, 1), self.segment_id)
+
+    # --- Chemins ---
+
+    def segment_ids(self) -> list:
+        """Segments existants [(journée, numéro), ...], du plus ancien au plus récent."""
+        ids = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                ids.append((int(match.group(1)), int(match.group(2))))
+        return sorted(ids)
+
+    def _segment_path(self, segment_id: tuple) -> str:
+        return os.path.join(self.directory, f"segment-{segment_id[0]:06d}-{segment_id[1]:06d}.seg")
+
+    def _index_path(self, segment_id: tuple) -> str:
+        return os.path.join(self.directory, f"segment-{segment_id[0]:06d}-{segment_id[1]:06d}.idx")
+
+    # --- Écriture ---
+
+    def append(self, game_number: int, chat_id: int, message_id: int, text: str, edited: bool = False):
+        """Ajoute un message brut au buffer mémoire (aucune E/S, appelé depuis les handlers)."""
+        self.pending.setdefault(game_number, []).append({
+            'ts': time.time(),
+            'chat_id': chat_id,
+            'message_id': message_id,
+            'edited': edited,
+            'text': text,
+        })
+        self.pending_last_seen[game_number] = time.monotonic()
+
+    def _take_ready_blocks(self, force: bool) -> list:
+        """Retire du buffer les jeux sans nouveau message depuis hold_seconds (tous si force)."""
+        now = time.monotonic()
+        ready = [
+            game for game, last_seen in self.pending_last_seen.items()
+            if force or now - last_seen >= self.hold_seconds
+        ]
+        blocks = []
+        for game in sorted(ready):
+            del self.pending_last_seen[game]
+            blocks.append((game, self.pending.pop(game)))
+        return blocks
+
+    def _write_blocks(self, blocks: list, new_day: bool):
+        """Compresse et écrit les blocs (exécuté dans un thread), puis passe à la journée suivante si demandé."""
+        for game, records in blocks:
+            payload = "\n".join(json.dumps(record, ensure_ascii=False) for record in records)
+            block = zlib.compress(payload.encode('utf-8'))
+
+            segment_path = self._segment_path(self.segment_id)
+            offset = os.path.getsize(segment_path) if os.path.exists(segment_path) else 0
+            if offset and offset + len(block) > self.segment_max_bytes:
+                self.segment_id = (self.segment_id[0], self.segment_id[1] + 1)
+                segment_path = self._segment_path(self.segment_id)
+                offset = 0
+
+            with open(segment_path, 'ab') as f:
+                f.write(block)
+            with open(self._index_path(self.segment_id), 'ab') as f:
+                f.write(INDEX_RECORD.pack(game, offset, len(block)))
+            self.records_written += len(records)
+
+        # Après l'écriture : les jeux encore en mémoire au reset appartiennent à la journée qui se termine
+        if new_day and os.path.exists(self._segment_path(self.segment_id)):
+            self.segment_id = (self.segment_id[0] + 1, 1)
+
+    async def flush(self, force: bool = False, new_day: bool = False, run_blocking=None):
+        """
+        Écrit les jeux prêts sur disque dans un thread.
+
+        Args:
+            force: écrit tous les jeux en attente (arrêt, reset quotidien)
+            new_day: commence une nouvelle journée (les numéros de jeu recommencent)
+            run_blocking: coroutine d'exécution hors boucle, ex: BlockingPool.run
+                          (par défaut l'executor par défaut de la boucle)
+        """
+        async with self._flush_lock:
+            blocks = self._take_ready_blocks(force)
+            if not blocks and not new_day:
+                return
+            if run_blocking is not None:
+                await run_blocking(self._write_blocks, blocks, new_day)
+            else:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._write_blocks, blocks, new_day)
+
+    # --- Lecture ---
+
+    def _find_blocks(self, segment_id: tuple, game_number: int) -> list:
+        """Parcourt l'index mappé en mémoire d'un segment, sans le copier : [(offset, longueur), ...]."""
+        index_path = self._index_path(segment_id)
+        if not os.path.exists(index_path) or os.path.getsize(index_path) < INDEX_RECORD.size:
+            return []
+        blocks = []
+        with open(index_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            usable = len(index) - len(index) % INDEX_RECORD.size
+            for position in range(0, usable, INDEX_RECORD.size):
+                game, offset, length = INDEX_RECORD.unpack_from(index, position)
+                if game == game_number:
+                    blocks.append((offset, length))
+        return blocks
+
+    def pending_records(self, game_number: int) -> list:
+        """Copie des messages du jeu #N pas encore écrits (à appeler depuis la boucle asyncio)."""
+        return list(self.pending.get(game_number, []))
+
+    def read_game(self, game_number: int, pending: list = ()) -> list:
+        """
+        Retourne tous les messages archivés du jeu #N (création et éditions), dans l'ordre.
+
+        Les numéros de jeu recommençant chaque jour, seule la journée la plus récente
+        contenant ce jeu est lue, mais dans tous ses segments (rotation par taille,
+        éditions tardives). Exécuté dans un thread : les messages encore en mémoire
+        sont copiés sur la boucle par l'appelant (pending_records) et ajoutés à la fin.
+        """
+        segments = self.segment_ids()
+        records = []
+        for day in sorted({day for day, _ in segments}, reverse=True):
+            day_blocks = []
+            for segment_id in segments:
+                if segment_id[0] != day:
+                    continue
+                blocks = self._find_blocks(segment_id, game_number)
+                if blocks:
+                    day_blocks.append((segment_id, blocks))
+            if not day_blocks:
+                continue
+            for segment_id, blocks in day_blocks:
+                with open(self._segment_path(segment_id), 'rb') as f:
+                    for offset, length in blocks:
+                        f.seek(offset)
+                        payload = zlib.decompress(f.read(length)).decode('utf-8')
+                        records.extend(json.loads(line) for line in payload.split("\n"))
+            break
+        records.extend(pending)
+        return records
@@ -20,12 +20,69 @@ SOURCE_CHANNEL_2_ID = int(os.getenv('SOURCE_CHANNEL_2_ID', '-1003309666471'))
 # Canal où envoyer les prédictions
 PREDICTION_CHANNEL_ID = int(os.getenv('PREDICTION_CHANNEL_ID', '-1003554569009'))
 
+def _parse_destinations(value: str) -> dict:
+    """Parse "-100111,-100222:5" en {chat_id: intervalle minimal entre deux messages (s) ou None}."""
+    destinations = {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        chat_id, _, interval = item.partition(':')
+        destinations[int(chat_id)] = float(interval) if interval else None
+    return destinations
+
+# Canaux/groupes supplémentaires recevant les mêmes prédictions (VIP, autres langues...)
+# Format: "-100111,-100222:5" (id[:intervalle minimal en secondes entre deux messages])
+EXTRA_PREDICTION_CHANNELS = _parse_destinations(os.getenv('EXTRA_PREDICTION_CHANNELS', ''))
+# Intervalle minimal par défaut entre deux messages vers un même canal supplémentaire
+PREDICTION_MIN_INTERVAL_SECONDS = float(os.getenv('PREDICTION_MIN_INTERVAL_SECONDS', '3'))
+
 # === CONFIGURATION SERVEUR ===
 # Port for the web server
 PORT = int(os.getenv('PORT', '5000'))
 
+# === ARCHIVE DES MESSAGES SOURCES ===
+# Dossier de l'archive compressée des messages bruts (vide = archive désactivée)
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
+# Taille maximale d'un segment avant rotation (octets)
+ARCHIVE_SEGMENT_MAX_BYTES = int(os.getenv('ARCHIVE_SEGMENT_MAX_BYTES', str(8 * 1024 * 1024)))
+# Un jeu est écrit sur disque après ce délai sans nouveau message/édition (secondes)
+ARCHIVE_HOLD_SECONDS = int(os.getenv('ARCHIVE_HOLD_SECONDS', '60'))
+# Intervalle entre deux écritures par lot (secondes)
+ARCHIVE_FLUSH_SECONDS = int(os.getenv('ARCHIVE_FLUSH_SECONDS', '5'))
+
+# === HAUTE DISPONIBILITÉ (actif / standby) ===
+# Fichier SQLite partagé par les deux instances (vide = instance unique, toujours active)
+# Les deux instances sont connectées en même temps : chacune a sa propre session Telegram
+# (TELEGRAM_SESSION_<HA_NODE_ID>); TELEGRAM_SESSION partagée est ignorée dans ce mode
+HA_DB_PATH = os.getenv('HA_DB_PATH', '')
+# Identifiant de l'instance (par défaut nom d'hôte + PID); fixé pour choisir la session
+HA_NODE_ID = os.getenv('HA_NODE_ID', '')
+# Durée du bail de leadership et intervalle de renouvellement (secondes)
+HA_LEASE_SECONDS = float(os.getenv('HA_LEASE_SECONDS', '6'))
+HA_RENEW_SECONDS = float(os.getenv('HA_RENEW_SECONDS', '2'))
+# Intervalle maximal entre deux synchronisations de l'état (secondes)
+HA_SYNC_SECONDS = float(os.getenv('HA_SYNC_SECONDS', '1'))
+
+# === SURVEILLANCE DE LA BOUCLE ASYNCIO ===
+# Intervalle d'échantillonnage du retard de la boucle (millisecondes)
+LOOP_LAG_INTERVAL_MS = int(os.getenv('LOOP_LAG_INTERVAL_MS', '250'))
+# Seuil au-delà duquel un callback bloquant la boucle est journalisé (millisecondes)
+SLOW_CALLBACK_MS = int(os.getenv('SLOW_CALLBACK_MS', '200'))
+# Threads du pool des rapports (status, mémoire, lecture d'archive)
+REPORT_POOL_WORKERS = int(os.getenv('REPORT_POOL_WORKERS', '2'))
+
+# Jeton requis pour les endpoints de diagnostic (/debug/...). Vide = désactivés
+DEBUG_TOKEN = os.getenv('DEBUG_TOKEN', '')
+
 # === LOGIQUE DE PREDICTION ===
-# Mapping des costumes miroirs : ♦️<->♠️ et ❤️<->♣️
+# Fichier YAML des paramètres de stratégie (rechargé à chaud, voir strategy.py)
+STRATEGY_FILE = os.getenv('STRATEGY_FILE', 'strategy.yaml')
+# Intervalle de vérification des modifications du fichier (secondes)
+STRATEGY_POLL_SECONDS = int(os.getenv('STRATEGY_POLL_SECONDS', '5'))
+
+# Mapping des costumes miroirs par défaut : ♦️<->♠️ et ❤️<->♣️
+# (surchargé par suit_mapping dans STRATEGY_FILE)
 SUIT_MAPPING = {
     '♦': '♠',  # Carreau ↔ Pique
     '♠': '♦',
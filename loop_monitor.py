@@ -0,0 +1,152 @@
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# =========================================
+# Surveillance de la boucle asyncio et exécution du travail bloquant hors boucle
+# =========================================
+
+logger = logging.getLogger(__name__)
+
+class LoopLagMonitor:
+    """
+    Mesure le retard de la boucle asyncio et détecte les callbacks qui la bloquent.
+
+    - Un échantillonneur (tâche asyncio) dort `interval` secondes et mesure le retard
+      au réveil : c'est le temps pendant lequel la boucle n'a pas pu le reprendre.
+    - Un thread de surveillance vérifie que l'échantillonneur bat toujours. Si la boucle
+      est bloquée plus de `slow_threshold_ms`, il lit la pile du thread de la boucle
+      et journalise la coroutine (et la ligne) qui la monopolise.
+    """
+
+    def __init__(self, interval: float, slow_threshold_ms: float):
+        self.interval = interval
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.samples = 0
+        self.last_lag_ms = 0.0
+        self.avg_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.slow_events = 0
+        self.last_slow = None       # {'at', 'blocked_ms', 'coroutine', 'location'}
+        self._last_beat = time.monotonic()
+        self._stall_reported = False
+        self._loop_thread_id = None
+        self._stopped = threading.Event()
+        self._sampler_task = None
+
+    def start(self):
+        """Démarre l'échantillonneur et le thread de surveillance (à appeler dans la boucle)."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._sampler_task = asyncio.create_task(self._sample_loop())
+        threading.Thread(target=self._watchdog, name='loop-watchdog', daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def _sample_loop(self):
+        loop = asyncio.get_running_loop()
+        while not self._stopped.is_set():
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+
+            self.samples += 1
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            # Moyenne mobile exponentielle (~ dernières 20 mesures)
+            self.avg_lag_ms += (lag_ms - self.avg_lag_ms) / min(self.samples, 20)
+
+            self._last_beat = time.monotonic()
+            self._stall_reported = False
+
+    def _watchdog(self):
+        period = min(self.interval, self.slow_threshold) / 2
+        while not self._stopped.wait(period):
+            blocked = time.monotonic() - self._last_beat - self.interval
+            if blocked < self.slow_threshold or self._stall_reported:
+                continue
+            self._stall_reported = True
+            self.slow_events += 1
+            coroutine, location = self._describe_loop_thread()
+            self.last_slow = {
+                'at': time.strftime('%H:%M:%S'),
+                'blocked_ms': round(blocked * 1000),
+                'coroutine': coroutine,
+                'location': location,
+            }
+            logger.warning(f"🐢 Boucle asyncio bloquée depuis {blocked * 1000:.0f}ms par {coroutine} ({location})")
+
+    def _describe_loop_thread(self) -> tuple:
+        """Retourne (chaîne des coroutines, fichier:ligne fonction) pour le thread de la boucle."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return 'inconnu', 'inconnu'
+
+        location = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        coroutines = []
+        while frame is not None:
+            if frame.f_code.co_flags & inspect.CO_COROUTINE:
+                coroutines.append(frame.f_code.co_name)
+            frame = frame.f_back
+        chain = ' → '.join(reversed(coroutines)) if coroutines else 'callback (hors coroutine)'
+        return chain, location
+
+    def report(self) -> dict:
+        return {
+            'samples': self.samples,
+            'last_lag_ms': round(self.last_lag_ms, 1),
+            'avg_lag_ms': round(self.avg_lag_ms, 1),
+            'max_lag_ms': round(self.max_lag_ms, 1),
+            'slow_events': self.slow_events,
+            'last_slow': self.last_slow,
+        }
+
+class BlockingPool:
+    """
+    Pool de threads nommé à concurrence bornée pour le travail bloquant ou coûteux.
+
+    Au plus `max_pending` appels sont soumis en même temps, les suivants attendent
+    leur tour sans occuper la boucle asyncio.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._semaphore = asyncio.Semaphore(max_pending)
+        self.active = 0
+        self.completed = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """Exécute func(*args, **kwargs) dans le pool et retourne son résultat."""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            self.active += 1
+            started = time.perf_counter()
+            try:
+                return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.active -= 1
+                self.completed += 1
+                self.total_ms += elapsed_ms
+                self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def report(self) -> dict:
+        return {
+            'active': self.active,
+            'completed': self.completed,
+            'avg_ms': round(self.total_ms / self.completed, 1) if self.completed else 0.0,
+            'max_ms': round(self.max_ms, 1),
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
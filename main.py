@@ -1,17 +1,33 @@
 import os
 import asyncio
+import json
 import re
+import socket
 import logging
 import sys
+import threading
+import time as time_module
+import tracemalloc
+from collections import deque
 from datetime import datetime, timedelta, timezone, time
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
 from aiohttp import web
 from config import (
     API_ID, API_HASH, BOT_TOKEN, ADMIN_ID,
-    SOURCE_CHANNEL_ID, SOURCE_CHANNEL_2_ID, PREDICTION_CHANNEL_ID, PORT,
-    SUIT_MAPPING, ALL_SUITS, SUIT_DISPLAY
+    SOURCE_CHANNEL_ID, SOURCE_CHANNEL_2_ID, PREDICTION_CHANNEL_ID, PORT, DEBUG_TOKEN,
+    STRATEGY_FILE, STRATEGY_POLL_SECONDS, ALL_SUITS, SUIT_DISPLAY,
+    ARCHIVE_DIR, ARCHIVE_SEGMENT_MAX_BYTES, ARCHIVE_HOLD_SECONDS, ARCHIVE_FLUSH_SECONDS,
+    LOOP_LAG_INTERVAL_MS, SLOW_CALLBACK_MS, REPORT_POOL_WORKERS,
+    HA_DB_PATH, HA_NODE_ID, HA_LEASE_SECONDS, HA_RENEW_SECONDS, HA_SYNC_SECONDS,
+    EXTRA_PREDICTION_CHANNELS, PREDICTION_MIN_INTERVAL_SECONDS
 )
+from archive import MessageArchive
+from loop_monitor import LoopLagMonitor, BlockingPool
+from reorder import ResultReorderBuffer
+from replication import ReplicationStore
+from strategy import StrategyConfig, load_strategy
+from suit_stats import SuitStatsWindow
 
 # --- Configuration et Initialisation ---
 logging.basicConfig(
@@ -34,10 +50,18 @@ if not BOT_TOKEN:
     logger.error("BOT_TOKEN manquant")
     exit(1)
 
-logger.info(f"Configuration: SOURCE_CHANNEL={SOURCE_CHANNEL_ID}, SOURCE_CHANNEL_2={SOURCE_CHANNEL_2_ID}, PREDICTION_CHANNEL={PREDICTION_CHANNEL_ID}")
-
-# Initialisation du client Telegram avec session string ou nouvelle session
-session_string = os.getenv('TELEGRAM_SESSION', '')
+logger.info(f"Configuration: SOURCE_CHANNEL={SOURCE_CHANNEL_ID}, SOURCE_CHANNEL_2={SOURCE_CHANNEL_2_ID}, PREDICTION_CHANNEL={PREDICTION_CHANNEL_ID}, EXTRA_PREDICTION_CHANNELS={list(EXTRA_PREDICTION_CHANNELS)}")
+
+# Initialisation du client Telegram avec session string ou nouvelle session.
+# Une session (clé d'autorisation) ne doit servir qu'à une connexion : en mode actif/standby
+# les deux instances sont connectées en même temps, chacune a donc sa propre session
+# (TELEGRAM_SESSION_<HA_NODE_ID>), sinon Telegram rejette la clé (AUTH_KEY_DUPLICATED)
+if HA_DB_PATH:
+    session_string = os.getenv(f'TELEGRAM_SESSION_{HA_NODE_ID}', '') if HA_NODE_ID else ''
+    if os.getenv('TELEGRAM_SESSION') and not session_string:
+        logger.warning("HA_DB_PATH défini : TELEGRAM_SESSION partagée ignorée, nouvelle session ouverte avec BOT_TOKEN (définir TELEGRAM_SESSION_<HA_NODE_ID> par instance)")
+else:
+    session_string = os.getenv('TELEGRAM_SESSION', '')
 client = TelegramClient(StringSession(session_string), API_ID, API_HASH)
 
 # --- Variables Globales d'État ---
@@ -54,38 +78,103 @@ last_source_game_number = 0
 # NOUVELLES VARIABLES POUR LA LOGIQUE DE BLOCAGE (MAX 3 PRÉDICTIONS CONSÉCUTIVES)
 suit_consecutive_counts = {}      # Compteur de prédictions consécutives par costume
 suit_results_history = {}         # Historique des 3 derniers résultats par costume
-suit_block_until = {}             # Timestamp de fin de blocage pour chaque costume (30min)
+suit_block_until = {}             # Timestamp de fin de blocage pour chaque costume (consecutive_block_minutes)
 last_predicted_suit = None        # Dernier costume prédit (pour détecter les changements)
-suit_first_prediction_time = {}   # Timestamp de la première prédiction consécutive (pour les 30min)
-
+suit_first_prediction_time = {}   # Timestamp de la première prédiction consécutive (pour consecutive_block_minutes)
+
+# Canaux supplémentaires : limite de débit propre à chacun (le canal principal n'attend jamais)
+extra_destinations = {
+    chat_id: {
+        'min_interval': PREDICTION_MIN_INTERVAL_SECONDS if interval is None else interval,
+        'lock': asyncio.Lock(),
+        'next_send_at': 0.0,
+    }
+    for chat_id, interval in EXTRA_PREDICTION_CHANNELS.items()
+    if chat_id != PREDICTION_CHANNEL_ID
+}
+# Tâches d'envoi vers les canaux supplémentaires, par jeu (attendues avant d'éditer)
+fanout_send_tasks = {}
+# Références fortes vers les tâches de fond : la boucle ne garde qu'une référence
+# faible, une tâche non référencée peut être détruite avant d'avoir terminé
+background_tasks = set()
+
+PREDICTION_CANCELLED = '⏹️'   # Prédiction clôturée sans résultat observable (numérotation remise à zéro)
 MAX_PENDING_PREDICTIONS = 5  # Augmenté pour gérer les rattrapages
 PROXIMITY_THRESHOLD = 3      # Nombre de jeux avant l'envoi depuis la file d'attente
 USER_A = 1                   # Valeur 'a' choisie par l'utilisateur (entier naturel)
 
+# Paramètres de stratégie (snapshot immuable, remplacé atomiquement par reload_strategy)
+try:
+    STRATEGY = load_strategy(STRATEGY_FILE)
+except Exception as e:
+    logger.error(f"Stratégie invalide dans {STRATEGY_FILE}, valeurs par défaut utilisées: {e}")
+    STRATEGY = StrategyConfig()
+strategy_file_mtime = os.path.getmtime(STRATEGY_FILE) if os.path.exists(STRATEGY_FILE) else None
+
+# Compteurs glissants par costume calculés sur les résultats Source 1
+local_suit_stats = SuitStatsWindow(STRATEGY.local_stats_window, STRATEGY.mirror_pairs)
+
+# Remise en ordre des résultats Source 1 : traités strictement dans l'ordre des jeux
+result_buffer = ResultReorderBuffer(STRATEGY.reorder_hold_seconds, STRATEGY.reorder_max_gap)
+results_lock = asyncio.Lock()
+reorder_timer = None  # asyncio.TimerHandle de la prochaine libération forcée
+
+# Archive compressée des messages bruts des canaux sources (None si désactivée)
+message_archive = MessageArchive(ARCHIVE_DIR, ARCHIVE_SEGMENT_MAX_BYTES, ARCHIVE_HOLD_SECONDS) if ARCHIVE_DIR else None
+
+# Surveillance de la boucle asyncio et pools pour le travail bloquant/coûteux :
+# les rapports (status, mémoire, archive) et les écritures disque ne passent
+# jamais sur la boucle qui traite les résultats de jeu
+loop_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL_MS / 1000, SLOW_CALLBACK_MS)
+report_pool = BlockingPool('report', max_workers=REPORT_POOL_WORKERS, max_pending=REPORT_POOL_WORKERS * 2)
+io_pool = BlockingPool('io', max_workers=1, max_pending=2)
+
+# Haute disponibilité : sans HA_DB_PATH l'instance est seule et toujours active.
+# Sinon seule l'instance qui détient le bail traite les messages; l'autre reste
+# connectée et recharge l'état publié pour pouvoir reprendre en quelques secondes.
+replication_store = None
+if HA_DB_PATH:
+    replication_store = ReplicationStore(HA_DB_PATH, HA_NODE_ID or f"{socket.gethostname()}-{os.getpid()}", HA_LEASE_SECONDS)
+    ha_pool = BlockingPool('ha', max_workers=1, max_pending=4)
+is_leader = replication_store is None
+state_dirty = False
+state_changed = asyncio.Event()
+replicated_version = 0
+# Standby : derniers messages Source 1 finalisés reçus (jeu, texte), rejoués à la prise
+# du bail pour ne pas perdre les résultats arrivés après la dernière publication de l'active
+STANDBY_REPLAY_MAX = 200
+standby_recent_results = deque(maxlen=STANDBY_REPLAY_MAX)
+
 source_channel_ok = False
 prediction_channel_ok = False
 transfer_enabled = True # Initialisé à True
 
+# Diagnostics mémoire (tracemalloc) : snapshot de référence pour les diffs
+memory_baseline_snapshot = None
+memory_report_lock = threading.Lock()
+MEMORY_TRACE_FRAMES = 1      # Profondeur des tracebacks enregistrés par tracemalloc
+
 # --- NOUVELLE FONCTION: Contrôle horaire des prédictions ---
 
 def is_prediction_time_allowed():
     """
     Vérifie si l'heure actuelle permet l'envoi de prédictions automatiques.
 
-    Règles:
+    Règles (blocked_from_minute = 40 par défaut):
     - Prédictions autorisées aux heures pile (XX:00) jusqu'à XX:39
     - Prédictions bloquées de XX:40 à XX:59 (attendre l'heure suivante)
 
     Returns:
         tuple: (bool, str) - (autorisé, message explicatif)
     """
+    blocked_from = STRATEGY.blocked_from_minute
     now = datetime.now()
     current_minute = now.minute
 
-    if current_minute >= 40:
+    if current_minute >= blocked_from:
         next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
         wait_minutes = 60 - current_minute
-        return False, f"🚫 Prédictions bloquées (H:40-H:59). Prochaine fenêtre à {next_hour.strftime('%H:%M')} (dans {wait_minutes}min)"
+        return False, f"🚫 Prédictions bloquées (H:{blocked_from:02d}-H:59). Prochaine fenêtre à {next_hour.strftime('%H:%M')} (dans {wait_minutes}min)"
 
     return True, f"✅ Prédictions autorisées ({now.strftime('%H:%M')})"
 
@@ -141,30 +230,68 @@ def has_suit_in_group(group_str: str, target_suit: str) -> bool:
 
 def get_predicted_suit(missing_suit: str) -> str:
     """Applique le mapping personnalisé (couleur manquante -> couleur prédite)."""
-    # Ce mapping est maintenant l'inverse : ♠️<->♣️ et ♥️<->♦️
-    # Assurez-vous que SUIT_MAPPING dans config.py contient :
-    # SUIT_MAPPING = {'♠': '♣', '♣': '♠', '♥': '♦', '♦': '♥'}
-    return SUIT_MAPPING.get(missing_suit, missing_suit)
+    # Le mapping vient de suit_mapping dans STRATEGY_FILE (défaut: SUIT_MAPPING de config.py)
+    return STRATEGY.suit_mapping.get(missing_suit, missing_suit)
 
 # --- Logique de Prédiction et File d'Attente ---
 
-async def send_prediction_to_channel(target_game: int, predicted_suit: str, base_game: int, rattrapage=0, original_game=None):
-    """Envoie la prédiction au canal de prédiction et l'ajoute aux prédictions actives."""
-    try:
-        # Si c'est un rattrapage, on ne crée pas un nouveau message, on garde la trace
-        if rattrapage > 0:
-            pending_predictions[target_game] = {
-                'message_id': 0, # Pas de message pour le rattrapage lui-même
-                'suit': predicted_suit,
-                'base_game': base_game,
-                'status': '🔮',
-                'rattrapage': rattrapage,
-                'original_game': original_game,
-                'created_at': datetime.now().isoformat()
-            }
-            logger.info(f"Rattrapage {rattrapage} actif pour #{target_game} (Original #{original_game})")
+async def send_to_extra_destination(chat_id: int, text: str, edit_message_id: int = 0) -> int:
+    """
+    Envoie (ou édite si edit_message_id) un message vers un canal supplémentaire
+    en respectant son intervalle minimal entre deux messages.
+
+    Returns:
+        int: id du message, 0 en cas d'échec
+    """
+    destination = extra_destinations[chat_id]
+    async with destination['lock']:
+        wait = destination['next_send_at'] - time_module.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            if edit_message_id:
+                await client.edit_message(chat_id, edit_message_id, text)
+                return edit_message_id
+            sent = await client.send_message(chat_id, text)
+            return sent.id
+        except Exception as e:
+            logger.error(f"❌ Erreur {'mise à jour' if edit_message_id else 'envoi'} canal {chat_id}: {e}")
             return 0
+        finally:
+            destination['next_send_at'] = time_module.monotonic() + destination['min_interval']
+
+async def fanout_prediction(target_game: int, text: str, message_ids: dict):
+    """Envoie la prédiction à tous les canaux supplémentaires en parallèle et note les ids."""
+    chat_ids = list(extra_destinations)
+    results = await asyncio.gather(*(send_to_extra_destination(chat_id, text) for chat_id in chat_ids))
+    for chat_id, msg_id in zip(chat_ids, results):
+        if msg_id:
+            message_ids[chat_id] = msg_id
+    logger.info(f"Prédiction #{target_game} diffusée sur {sum(1 for msg_id in results if msg_id)}/{len(chat_ids)} canaux supplémentaires")
+    mark_state_dirty()
+
+async def fanout_status_update(game_number: int, text: str, message_ids: dict, send_task):
+    """Édite en parallèle les messages des canaux supplémentaires (après leur envoi)."""
+    if send_task is not None:
+        await send_task
+    edits = [
+        send_to_extra_destination(chat_id, text, edit_message_id=msg_id)
+        for chat_id, msg_id in message_ids.items()
+        if chat_id in extra_destinations and msg_id > 0
+    ]
+    if edits:
+        await asyncio.gather(*edits)
 
+def start_background_task(coro) -> asyncio.Task:
+    """Lance une tâche de fond en gardant une référence jusqu'à sa fin."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def send_prediction_to_channel(target_game: int, predicted_suit: str, base_game: int):
+    """Envoie la prédiction au canal de prédiction et l'ajoute aux prédictions actives."""
+    try:
         # NOUVEAU FORMAT DE MESSAGE DE PRÉDICTION
         prediction_msg = f"""🎮 banquier №{target_game}
 ⚜️ Couleur de la carte:{predicted_suit}
@@ -184,14 +311,24 @@ async def send_prediction_to_channel(target_game: int, predicted_suit: str, base
 
         pending_predictions[target_game] = {
             'message_id': msg_id,
+            # Ids des messages par canal (principal + supplémentaires)
+            'message_ids': {PREDICTION_CHANNEL_ID: msg_id} if msg_id else {},
             'suit': predicted_suit,
             'base_game': base_game,
             'status': '🔮',
             'check_count': 0,
+            # Rattrapage en cours : le jeu vérifié est target_game + rattrapage
             'rattrapage': 0,
             'created_at': datetime.now().isoformat()
         }
 
+        # Canaux supplémentaires : en tâche de fond, sans retarder le canal principal
+        if extra_destinations and prediction_channel_ok:
+            message_ids = pending_predictions[target_game]['message_ids']
+            fanout_send_tasks[target_game] = start_background_task(
+                fanout_prediction(target_game, prediction_msg, message_ids)
+            )
+
         logger.info(f"Prédiction active: Jeu #{target_game} - {predicted_suit}")
         return msg_id
 
@@ -199,21 +336,19 @@ async def send_prediction_to_channel(target_game: int, predicted_suit: str, base
         logger.error(f"Erreur envoi prédiction: {e}")
         return None
 
-def queue_prediction(target_game: int, predicted_suit: str, base_game: int, rattrapage=0, original_game=None):
+def queue_prediction(target_game: int, predicted_suit: str, base_game: int):
     """Met une prédiction en file d'attente pour un envoi différé."""
     # Vérification d'unicité
-    if target_game in queued_predictions or (target_game in pending_predictions and rattrapage == 0):
+    if target_game in queued_predictions or target_game in pending_predictions:
         return False
 
     queued_predictions[target_game] = {
         'target_game': target_game,
         'predicted_suit': predicted_suit,
         'base_game': base_game,
-        'rattrapage': rattrapage,
-        'original_game': original_game,
         'queued_at': datetime.now().isoformat()
     }
-    logger.info(f"📋 Prédiction #{target_game} mise en file d'attente (Rattrapage {rattrapage})")
+    logger.info(f"📋 Prédiction #{target_game} mise en file d'attente")
     return True
 
 async def check_and_send_queued_predictions(current_game: int):
@@ -228,15 +363,19 @@ async def check_and_send_queued_predictions(current_game: int):
         await send_prediction_to_channel(
             pred_data['target_game'],
             pred_data['predicted_suit'],
-            pred_data['base_game'],
-            pred_data.get('rattrapage', 0),
-            pred_data.get('original_game')
+            pred_data['base_game']
         )
 
-async def update_prediction_status(game_number: int, new_status: str):
-    """Met à jour le message de prédiction dans le canal."""
+async def update_prediction_status(game_number: int, new_status: str, count_result: bool = True):
+    """
+    Met à jour le message de prédiction dans le canal.
+
+    count_result=False : statut sans résultat observé (ex: PREDICTION_CANCELLED), qui
+    n'entre pas dans l'historique des résultats du costume (blocages).
+    """
     global suit_consecutive_counts, suit_results_history, suit_block_until, last_predicted_suit
 
+    strategy = STRATEGY
     try:
         if game_number not in pending_predictions:
             return False
@@ -257,8 +396,20 @@ async def update_prediction_status(game_number: int, new_status: str):
             except Exception as e:
                 logger.error(f"❌ Erreur mise à jour: {e}")
 
+        # Canaux supplémentaires : éditions parallèles en tâche de fond
+        if extra_destinations and (pred.get('message_ids') or game_number in fanout_send_tasks):
+            start_background_task(fanout_status_update(
+                game_number, updated_msg, pred.setdefault('message_ids', {}), fanout_send_tasks.get(game_number)
+            ))
+
         # --- NOUVELLE LOGIQUE DE GESTION DES RÉSULTATS ---
 
+        if not count_result:
+            pred['status'] = new_status
+            del pending_predictions[game_number]
+            fanout_send_tasks.pop(game_number, None)
+            return True
+
         # Initialiser l'historique pour ce costume si nécessaire
         if suit not in suit_results_history:
             suit_results_history[suit] = []
@@ -281,16 +432,16 @@ async def update_prediction_status(game_number: int, new_status: str):
                     target_game = last_source_game_number + 1
                     queue_prediction(target_game, suit, last_source_game_number)
 
-                # Puis bloquer ce costume pendant 5 minutes
-                block_until = datetime.now() + timedelta(minutes=5)
+                # Puis bloquer ce costume pendant result_block_minutes (5 par défaut)
+                block_until = datetime.now() + timedelta(minutes=strategy.result_block_minutes)
                 suit_block_until[suit] = block_until
                 suit_consecutive_counts[suit] = 0  # Réinitialiser le compteur
                 logger.info(f"{suit} bloqué jusqu'à {block_until}")
 
             # CAS 2 : Si 3 succès consécutifs (tous ✅)
             elif all('✅' in result for result in suit_results_history[suit]):
-                logger.info(f"3 succès consécutifs pour {suit} → Blocage 5 minutes")
-                block_until = datetime.now() + timedelta(minutes=5)
+                logger.info(f"3 succès consécutifs pour {suit} → Blocage {strategy.result_block_minutes} minutes")
+                block_until = datetime.now() + timedelta(minutes=strategy.result_block_minutes)
                 suit_block_until[suit] = block_until
                 suit_consecutive_counts[suit] = 0  # Réinitialiser le compteur
                 logger.info(f"{suit} bloqué jusqu'à {block_until}")
@@ -304,78 +455,58 @@ async def update_prediction_status(game_number: int, new_status: str):
         # Supprimer si terminé
         if new_status in ['✅0️⃣', '✅1️⃣', '✅2️⃣', '✅3️⃣', '❌']:
             del pending_predictions[game_number]
+            fanout_send_tasks.pop(game_number, None)
 
         return True
     except Exception as e:
         logger.error(f"Erreur update_status: {e}")
         return False
 
-async def check_prediction_result(game_number: int, second_group: str):
-    """Vérifie les résultats selon la séquence ✅0️⃣, ✅1️⃣, ✅2️⃣, ✅3️⃣ ou ❌."""
-    # 1. Vérification pour le jeu actuel (Cible N)
-    if game_number in pending_predictions:
-        pred = pending_predictions[game_number]
-        if pred.get('rattrapage', 0) == 0:
-            target_suit = pred['suit']
-            # MODIFIÉ : Utilisation du deuxième groupe au lieu du premier
-            if has_suit_in_group(second_group, target_suit):
-                await update_prediction_status(game_number, '✅0️⃣')
-                return
-            else:
-                # Échec N, on lance le rattrapage 1 pour N+1
-                next_target = game_number + 1
-                queue_prediction(next_target, target_suit, pred['base_game'], rattrapage=1, original_game=game_number)
-                logger.info(f"Échec # {game_number}, Rattrapage 1 planifié pour #{next_target}")
-
-    # 2. Vérification pour les rattrapages (N-1, N-2, N-3)
-    # On cherche dans pending_predictions si un jeu original correspond à un rattrapage
-    for target_game, pred in list(pending_predictions.items()):
-        if target_game == game_number and pred.get('rattrapage', 0) > 0:
-            original_game = pred.get('original_game', target_game - pred['rattrapage'])
-            target_suit = pred['suit']
-            rattrapage_actuel = pred['rattrapage']
-
-            # MODIFIÉ : Utilisation du deuxième groupe au lieu du premier
-            if has_suit_in_group(second_group, target_suit):
-                # Trouvé ! On met à jour le statut avec le bon numéro de rattrapage
-                await update_prediction_status(original_game, f'✅{rattrapage_actuel}️⃣')
-                # On supprime aussi l'entrée de rattrapage si elle est différente de l'originale
-                if target_game != original_game:
-                    del pending_predictions[target_game]
-                return
-            else:
-                # Échec du rattrapage actuel
-                if rattrapage_actuel < 3:
-                    # Continuer la séquence
-                    next_rattrapage = rattrapage_actuel + 1
-                    next_target = game_number + 1
-                    queue_prediction(next_target, target_suit, pred['base_game'], rattrapage=next_rattrapage, original_game=original_game)
-                    logger.info(f"Échec rattrapage {rattrapage_actuel} sur #{game_number}, Rattrapage {next_rattrapage} planifié pour #{next_target}")
-                    # Supprimer le rattrapage échoué pour laisser place au suivant
-                    del pending_predictions[target_game]
-                else:
-                    # Échec final après 3 rattrapages
-                    await update_prediction_status(original_game, '❌')
-                    if target_game != original_game:
-                        del pending_predictions[target_game]
-                    logger.info(f"Échec final pour la prédiction originale #{original_game} après 3 rattrapages")
-                return
+async def check_prediction_result(game_number: int, second_group):
+    """
+    Vérifie les résultats selon la séquence ✅0️⃣, ✅1️⃣, ✅2️⃣, ✅3️⃣ ou ❌.
+
+    Chaque prédiction active attend le jeu `numéro prédit + rattrapage` : toutes celles
+    qui attendent ce jeu sont résolues en un seul passage. second_group=None signale un
+    jeu dont le résultat n'a jamais été reçu : le rattrapage avance sans succès.
+    """
+    for original_game, pred in sorted(pending_predictions.items()):
+        rattrapage_actuel = pred.get('rattrapage', 0)
+        if original_game + rattrapage_actuel != game_number:
+            continue
+
+        target_suit = pred['suit']
+        # MODIFIÉ : Utilisation du deuxième groupe au lieu du premier
+        if second_group is not None and has_suit_in_group(second_group, target_suit):
+            # Trouvé ! On met à jour le statut avec le bon numéro de rattrapage
+            await update_prediction_status(original_game, f'✅{rattrapage_actuel}️⃣')
+        elif rattrapage_actuel < 3:
+            # Échec (ou résultat manquant) : rattrapage suivant sur le jeu suivant
+            pred['rattrapage'] = rattrapage_actuel + 1
+            reason = "Résultat manquant" if second_group is None else "Échec"
+            logger.info(f"{reason} #{game_number} pour #{original_game}, Rattrapage {rattrapage_actuel + 1} planifié pour #{game_number + 1}")
+        else:
+            # Échec final après 3 rattrapages
+            await update_prediction_status(original_game, '❌')
+            logger.info(f"Échec final pour la prédiction originale #{original_game} après 3 rattrapages")
 
 def can_predict_suit(predicted_suit: str) -> tuple[bool, str]:
     """
-    Vérifie si un costume peut être prédit selon la règle des 3 consécutives.
+    Vérifie si un costume peut être prédit selon la règle des prédictions consécutives.
 
-    Règles:
-    - Maximum 3 prédictions consécutives du même costume
-    - Après 3 prédictions, le costume est bloqué jusqu'à:
+    Règles (max_consecutive = 3 et consecutive_block_minutes = 30 par défaut):
+    - Maximum max_consecutive prédictions consécutives du même costume
+    - Après max_consecutive prédictions, le costume est bloqué jusqu'à:
       1. Un autre costume soit prédit (changement de costume)
-      2. OU après 30 minutes d'attente
+      2. OU après consecutive_block_minutes minutes d'attente
 
     Returns:
         (bool, str): (peut prédire, raison si bloqué)
     """
     global suit_consecutive_counts, suit_block_until, last_predicted_suit, suit_first_prediction_time
 
+    strategy = STRATEGY
+    block_duration = timedelta(minutes=strategy.consecutive_block_minutes)
     now = datetime.now()
 
     # Si c'est un nouveau costume différent du dernier prédit
@@ -404,8 +535,8 @@ def can_predict_suit(predicted_suit: str) -> tuple[bool, str]:
             logger.info(f"{predicted_suit} est bloqué. Temps restant: {remaining.seconds//60}min {remaining.seconds%60}s")
             return False, f"{predicted_suit} bloqué pendant encore {remaining.seconds//60}min"
         else:
-            # Le blocage de 30min est terminé, on peut prédire
-            logger.info(f"Blocage de 30min terminé pour {predicted_suit}. Prédiction autorisée.")
+            # Le blocage est terminé, on peut prédire
+            logger.info(f"Blocage de {strategy.consecutive_block_minutes}min terminé pour {predicted_suit}. Prédiction autorisée.")
             del suit_block_until[predicted_suit]
             # Réinitialiser le compteur mais garder trace du temps pour les futures vérifications
             suit_consecutive_counts[predicted_suit] = 1
@@ -415,31 +546,31 @@ def can_predict_suit(predicted_suit: str) -> tuple[bool, str]:
     # Vérifier le compteur de prédictions consécutives
     current_count = suit_consecutive_counts.get(predicted_suit, 0)
 
-    if current_count >= 3:
-        # Le costume a déjà été prédit 3 fois consécutivement
-        # Vérifier si les 30 minutes sont écoulées depuis la première prédiction
+    if current_count >= strategy.max_consecutive:
+        # Le costume a déjà été prédit max_consecutive fois consécutivement
+        # Vérifier si consecutive_block_minutes sont écoulées depuis la première prédiction
         if predicted_suit in suit_first_prediction_time:
             first_time = suit_first_prediction_time[predicted_suit]
             elapsed = now - first_time
-            if elapsed >= timedelta(minutes=30):
-                # 30 minutes écoulées, on peut prédire à nouveau
-                logger.info(f"30 minutes écoulées pour {predicted_suit}. Réinitialisation et prédiction autorisée.")
+            if elapsed >= block_duration:
+                # Durée de blocage écoulée, on peut prédire à nouveau
+                logger.info(f"{strategy.consecutive_block_minutes} minutes écoulées pour {predicted_suit}. Réinitialisation et prédiction autorisée.")
                 suit_consecutive_counts[predicted_suit] = 1
                 suit_first_prediction_time[predicted_suit] = now
                 return True, ""
             else:
-                # Pas encore 30 minutes, bloquer
-                remaining = timedelta(minutes=30) - elapsed
+                # Durée de blocage pas encore écoulée, bloquer
+                remaining = block_duration - elapsed
                 # Mettre à jour le timestamp de blocage
-                suit_block_until[predicted_suit] = first_time + timedelta(minutes=30)
-                logger.info(f"{predicted_suit} a atteint 3 prédictions. Bloqué encore {remaining.seconds//60}min")
+                suit_block_until[predicted_suit] = first_time + block_duration
+                logger.info(f"{predicted_suit} a atteint {strategy.max_consecutive} prédictions. Bloqué encore {remaining.seconds//60}min")
                 return False, f"{predicted_suit} en pause ({remaining.seconds//60}min restantes)"
         else:
             # Pas de timestamp enregistré, bloquer par précaution
-            suit_block_until[predicted_suit] = now + timedelta(minutes=30)
+            suit_block_until[predicted_suit] = now + block_duration
             suit_first_prediction_time[predicted_suit] = now
-            logger.info(f"{predicted_suit} bloqué pour 30min (3 prédictions consécutives)")
-            return False, f"{predicted_suit} bloqué 30min (3 prédictions)"
+            logger.info(f"{predicted_suit} bloqué pour {strategy.consecutive_block_minutes}min ({strategy.max_consecutive} prédictions consécutives)")
+            return False, f"{predicted_suit} bloqué {strategy.consecutive_block_minutes}min ({strategy.max_consecutive} prédictions)"
 
     # Le costume peut être prédit
     return True, ""
@@ -459,32 +590,65 @@ def increment_suit_counter(predicted_suit: str):
 
     last_predicted_suit = predicted_suit
 
-    logger.info(f"Compteur {predicted_suit}: {suit_consecutive_counts[predicted_suit]}/3 consécutives")
+    logger.info(f"Compteur {predicted_suit}: {suit_consecutive_counts[predicted_suit]}/{STRATEGY.max_consecutive} consécutives")
+
+def cross_check_stats(stats: dict):
+    """Compare les écarts entre miroirs publiés par Source 2 aux écarts calculés localement."""
+    strategy = STRATEGY
+    local_diffs = local_suit_stats.mirror_diffs()
+    for s1, s2 in strategy.mirror_pairs:
+        if s1 not in stats or s2 not in stats or (s1, s2) not in local_diffs:
+            continue
+        remote_diff = stats[s1] - stats[s2]
+        local_diff = local_diffs[(s1, s2)]
+        # Divergence: le costume le plus faible n'est pas le même, ou l'écart diffère d'au moins le seuil
+        if remote_diff * local_diff < 0 or abs(remote_diff - local_diff) >= strategy.diff_threshold:
+            logger.warning(f"⚠️ Divergence {s1}/{s2}: Source 2 = {remote_diff:+d}, local = {local_diff:+d} ({local_suit_stats.filled} jeux)")
+        else:
+            logger.info(f"Cross-check {s1}/{s2}: Source 2 = {remote_diff:+d}, local = {local_diff:+d}")
 
 async def process_stats_message(message_text: str):
     """Traite les statistiques du canal 2 selon les miroirs ♦️<->♠️ et ❤️<->♣️."""
+    strategy = STRATEGY
+
+    stats = parse_stats_message(message_text)
+    if not stats:
+        return
+
+    if strategy.stats_cross_check:
+        cross_check_stats(stats)
+
+    # En mode 'local', les stats Source 2 ne servent qu'au cross-check
+    if strategy.stats_source == 'local':
+        return
+
+    return await evaluate_suit_stats(stats, 'Source 2')
+
+async def evaluate_suit_stats(stats: dict, origin: str, diffs: dict = None):
+    """
+    Applique la règle des miroirs à des compteurs par costume (Source 2 ou locaux).
+
+    diffs: écarts signés déjà tenus à jour par paire (SuitStatsWindow.mirror_diffs),
+           sinon recalculés depuis stats
+    """
     global last_source_game_number, last_predicted_suit, suit_consecutive_counts, suit_block_until
 
+    strategy = STRATEGY
+
     # --- NOUVELLE VÉRIFICATION HORAIRE ---
     can_send, time_message = is_prediction_time_allowed()
     if not can_send:
         logger.info(f"⏰ {time_message}")
         return False
 
-    stats = parse_stats_message(message_text)
-    if not stats:
-        return
-
-    # Miroirs : ♦️<->♠️ et ❤️<->♣️
-    pairs = [('♦', '♠'), ('♥', '♣')]
-
-    for s1, s2 in pairs:
+    # Miroirs : ♦️<->♠️ et ❤️<->♣️ (suit_mapping de la stratégie)
+    for s1, s2 in strategy.mirror_pairs:
         if s1 in stats and s2 in stats:
             v1, v2 = stats[s1], stats[s2]
-            diff = abs(v1 - v2)
+            diff = abs(diffs[(s1, s2)]) if diffs and (s1, s2) in diffs else abs(v1 - v2)
 
-            # MODIFIÉ : 6 changé à 10
-            if diff >= 10:
+            # MODIFIÉ : 6 changé à 10 (diff_threshold de la stratégie)
+            if diff >= strategy.diff_threshold:
                 # Prédire le plus faible parmi les deux miroirs
                 predicted_suit = s1 if v1 < v2 else s2
 
@@ -497,7 +661,7 @@ async def process_stats_message(message_text: str):
                     logger.info(f"🚫 Prédiction refusée pour {predicted_suit}: {reason}")
                     return False
 
-                logger.info(f"Décalage détecté entre {s1} ({v1}) et {s2} ({v2}): {diff}. Plus faible: {predicted_suit}")
+                logger.info(f"[{origin}] Décalage détecté entre {s1} ({v1}) et {s2} ({v2}): {diff}. Plus faible: {predicted_suit}")
 
                 if last_source_game_number > 0:
                     target_game = last_source_game_number + USER_A
@@ -506,7 +670,7 @@ async def process_stats_message(message_text: str):
                     if queue_prediction(target_game, predicted_suit, last_source_game_number):
                         increment_suit_counter(predicted_suit)
 
-                    return # Une seule prédiction par message de stats
+                    return # Une seule prédiction par mise à jour des stats
 
 def is_message_finalized(message: str) -> bool:
     """Vérifie si le message est un résultat final (non en cours)."""
@@ -517,7 +681,7 @@ def is_message_finalized(message: str) -> bool:
 
 async def process_finalized_message(message_text: str, chat_id: int):
     """Traite les messages du canal source 1 ou 2."""
-    global last_transferred_game, current_game_number, last_source_game_number
+    global last_transferred_game
     try:
         if chat_id == SOURCE_CHANNEL_2_ID:
             await process_stats_message(message_text)
@@ -530,9 +694,6 @@ async def process_finalized_message(message_text: str, chat_id: int):
         if game_number is None:
             return
 
-        current_game_number = game_number
-        last_source_game_number = game_number
-
         # Hash pour éviter doublons
         message_hash = f"{game_number}_{message_text[:50]}"
         if message_hash in processed_messages:
@@ -545,41 +706,159 @@ async def process_finalized_message(message_text: str, chat_id: int):
             return
         second_group = groups[1]  # MODIFIÉ : Index 1 au lieu de 0
 
+        # Remise en ordre : les résultats sont traités strictement dans l'ordre des jeux
+        async with results_lock:
+            now = time_module.monotonic()
+            # Reprise (redémarrage, reset du tampon) : on repart du dernier jeu traité
+            if last_source_game_number > 0:
+                result_buffer.start_at(last_source_game_number + 1)
+            if result_buffer.is_new_sequence(game_number):
+                # Numéro très ancien : édition tardive, sauf si plusieurs numéros consécutifs le confirment
+                new_sequence = result_buffer.note_restart_candidate(game_number, second_group)
+                if new_sequence is None:
+                    logger.info(f"Résultat #{game_number} ignoré (bien avant #{result_buffer.next_game}, édition tardive ?)")
+                    return
+                # Numérotation repartie de plus bas : on termine l'ancienne séquence
+                await process_released_results(result_buffer.drain(now, force=True))
+                await close_previous_sequence()
+                result_buffer.clear()
+                released = []
+                for game, group in new_sequence:
+                    released += result_buffer.push(game, group, now)
+            else:
+                released = result_buffer.push(game_number, second_group, now)
+                if not released and game_number not in result_buffer.held:
+                    logger.info(f"Résultat #{game_number} ignoré (doublon ou arrivé après le délai)")
+            await process_released_results(released)
+        schedule_reorder_drain()
+
+    except Exception as e:
+        logger.error(f"Erreur traitement: {e}")
+
+async def process_released_results(released: list):
+    """Traite, dans l'ordre, les résultats libérés par le tampon de remise en ordre."""
+    global current_game_number, last_source_game_number
+
+    for game_number, second_group in released:
+        await advance_skipped_chains(game_number)
+        if second_group is None:
+            # Jeu jamais reçu : les rattrapages qui l'attendaient passent au jeu suivant
+            logger.warning(f"⚠️ Résultat #{game_number} manquant")
+            await check_prediction_result(game_number, None)
+            await check_and_send_queued_predictions(game_number)
+            continue
+
+        current_game_number = game_number
+        last_source_game_number = game_number
+
+        # Compteurs locaux (toujours tenus à jour, pour le cross-check et le changement de mode)
+        counted = local_suit_stats.push(game_number, get_suits_in_group(second_group))
+
         # Vérification des résultats
         await check_prediction_result(game_number, second_group)
+        # Prédiction immédiate sur les compteurs locaux, sans attendre Source 2
+        if counted and STRATEGY.stats_source in ('local', 'both'):
+            await evaluate_suit_stats(local_suit_stats.stats(), 'Source 1', local_suit_stats.mirror_diffs())
         # Envoi des files d'attente
         await check_and_send_queued_predictions(game_number)
 
+async def advance_skipped_chains(game_number: int):
+    """
+    Avance les prédictions qui attendaient un jeu antérieur à game_number jamais libéré.
+
+    Arrive quand le tampon démarre sans position (redémarrage) ou saute plus de
+    reorder_max_gap jeux : les jeux sautés comptent comme des rattrapages échoués.
+    """
+    for original_game, pred in sorted(pending_predictions.items()):
+        awaited_game = original_game + pred.get('rattrapage', 0)
+        if awaited_game >= game_number:
+            continue
+        if game_number - original_game <= 3:
+            pred['rattrapage'] = game_number - original_game
+            logger.warning(f"⚠️ Jeux #{awaited_game} à #{game_number - 1} jamais reçus pour #{original_game}, Rattrapage {pred['rattrapage']} sur #{game_number}")
+        else:
+            await update_prediction_status(original_game, '❌')
+            logger.warning(f"⚠️ Jeux #{awaited_game} à #{game_number - 1} jamais reçus : échec final pour #{original_game}")
+
+async def close_previous_sequence():
+    """
+    Numérotation remise à zéro (confirmée) : les prédictions de l'ancienne séquence ne
+    peuvent plus être vérifiées. Elles sont clôturées sans résultat (⏹️), jamais en ❌.
+    """
+    global current_game_number, last_source_game_number
+
+    for original_game in sorted(pending_predictions):
+        await update_prediction_status(original_game, PREDICTION_CANCELLED, count_result=False)
+    queued_predictions.clear()
+    # Compteurs locaux de l'ancienne séquence : la nouvelle repart de zéro
+    local_suit_stats.clear()
+    current_game_number = 0
+    last_source_game_number = 0
+    logger.warning("⚠️ Numérotation Source 1 remise à zéro : prédictions de l'ancienne séquence clôturées sans résultat")
+
+def schedule_reorder_drain():
+    """Programme la libération des résultats retenus à l'expiration de leur délai d'attente."""
+    global reorder_timer
+    if reorder_timer is not None:
+        reorder_timer.cancel()
+        reorder_timer = None
+    delay = result_buffer.seconds_until_release(time_module.monotonic())
+    if delay is not None:
+        loop = asyncio.get_running_loop()
+        reorder_timer = loop.call_later(delay, lambda: start_background_task(drain_reorder_buffer()))
+
+async def drain_reorder_buffer():
+    """Libère les résultats dont le délai d'attente est écoulé (trous compris)."""
+    global reorder_timer
+    reorder_timer = None
+    # Timer programmé avant une perte du bail : le standby ne traite pas les résultats
+    if not is_leader:
+        return
+    try:
+        async with results_lock:
+            await process_released_results(result_buffer.drain(time_module.monotonic()))
+        mark_state_dirty()
     except Exception as e:
-        logger.error(f"Erreur traitement: {e}")
+        logger.error(f"Erreur remise en ordre: {e}")
+    schedule_reorder_drain()
+
+def archive_source_message(event, chat_id: int, edited: bool):
+    """Ajoute le message brut à l'archive, indexé par son numéro de jeu (ou le dernier connu pour Source 2)."""
+    if message_archive is None:
+        return
+    message_text = event.message.message or ''
+    game_number = extract_game_number(message_text)
+    if game_number is None:
+        game_number = last_source_game_number
+    message_archive.append(game_number, chat_id, event.message.id, message_text, edited=edited)
 
 async def handle_message(event):
-    """Gère les nouveaux messages dans les canaux sources."""
+    """Gère les nouveaux messages: commandes en privé, résultats dans les canaux sources."""
     try:
-        sender = await event.get_sender()
-        sender_id = getattr(sender, 'id', event.sender_id)
+        # Instance en standby : ne traite rien (l'instance active répond), garde les résultats Source 1
+        if not is_leader:
+            remember_standby_result(event)
+            return
 
-        # LOG DE DÉBOGAGE POUR VOIR TOUS LES MESSAGES ENTRANTS
-        chat = await event.get_chat()
-        chat_id = chat.id
-        # Convert internal ID to -100xxx format if it's a channel
-        if hasattr(chat, 'broadcast') and chat.broadcast:
-            if not str(chat_id).startswith('-100'):
-                chat_id = int(f"-100{abs(chat_id)}")
+        # Messages privés : uniquement les commandes, routées par dispatch_command
+        if event.is_private:
+            await dispatch_command(event)
+            return
+
+        # event.chat_id est déjà au format -100xxx pour les canaux (pas d'appel réseau)
+        chat_id = event.chat_id
 
+        # LOG DE DÉBOGAGE POUR VOIR TOUS LES MESSAGES ENTRANTS
         logger.info(f"DEBUG: Message reçu de chat_id={chat_id}: {event.message.message[:50]}...")
 
         if chat_id == SOURCE_CHANNEL_ID or chat_id == SOURCE_CHANNEL_2_ID:
+            archive_source_message(event, chat_id, edited=False)
             message_text = event.message.message
             await process_finalized_message(message_text, chat_id)
             # Après traitement, si c'est le canal 2, on force la vérification de l'envoi
             if chat_id == SOURCE_CHANNEL_2_ID:
                 await check_and_send_queued_predictions(current_game_number)
-
-        # Gérer les commandes admin même si elles ne viennent pas d'un canal
-        if sender_id == ADMIN_ID:
-            if event.message.message.startswith('/'):
-                logger.info(f"DEBUG: Commande admin reçue: {event.message.message}")
+            mark_state_dirty()
 
     except Exception as e:
         logger.error(f"Erreur handle_message: {e}")
@@ -587,18 +866,20 @@ async def handle_message(event):
 async def handle_edited_message(event):
     """Gère les messages édités dans les canaux sources."""
     try:
-        chat = await event.get_chat()
-        chat_id = chat.id
-        if hasattr(chat, 'broadcast') and chat.broadcast:
-            if not str(chat_id).startswith('-100'):
-                chat_id = int(f"-100{abs(chat_id)}")
+        if not is_leader:
+            remember_standby_result(event)
+            return
+
+        chat_id = event.chat_id
 
         if chat_id == SOURCE_CHANNEL_ID or chat_id == SOURCE_CHANNEL_2_ID:
+            archive_source_message(event, chat_id, edited=True)
             message_text = event.message.message
             await process_finalized_message(message_text, chat_id)
             # Après traitement, si c'est le canal 2, on force la vérification de l'envoi
             if chat_id == SOURCE_CHANNEL_2_ID:
                 await check_and_send_queued_predictions(current_game_number)
+            mark_state_dirty()
 
     except Exception as e:
         logger.error(f"Erreur handle_edited_message: {e}")
@@ -608,161 +889,739 @@ async def handle_edited_message(event):
 client.add_event_handler(handle_message, events.NewMessage())
 client.add_event_handler(handle_edited_message, events.MessageEdited())
 
-# --- Commandes Administrateur ---
+# --- Routeur des Commandes ---
 
-@client.on(events.NewMessage(pattern='/start'))
-async def cmd_start(event):
-    if event.is_group or event.is_channel: return
-    await event.respond("🤖 **Bot de Prédiction Baccarat**\n\nCommandes: `/status`, `/help`, `/debug`, `/checkchannels`")
+# Commandes enregistrées : nom -> {'handler', 'admin', 'deny_message'}
+COMMANDS = {}
+# Métriques par commande : nom -> {'calls', 'errors', 'total_ms', 'max_ms'}
+command_metrics = {}
 
-@client.on(events.NewMessage(pattern=r'^/a (\d+)$'))
-async def cmd_set_a_shortcut(event):
-    if event.is_group or event.is_channel: return
-    if event.sender_id != ADMIN_ID and ADMIN_ID != 0: return
+def command(name: str, admin: bool = True, deny_message: str = None):
+    """
+    Enregistre un handler de commande privée dans COMMANDS.
 
-    global USER_A
+    Le handler reçoit (event, args) où args est le texte après le nom de la commande.
+    Si admin=True, seule l'ADMIN_ID peut l'exécuter (deny_message est envoyé aux autres).
+    """
+    def decorator(handler):
+        COMMANDS[name] = {'handler': handler, 'admin': admin, 'deny_message': deny_message}
+        command_metrics[name] = {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        return handler
+    return decorator
+
+async def dispatch_command(event):
+    """Route une commande privée vers son handler (un seul contrôle d'autorisation)."""
+    text = event.message.message
+    if not text or text[0] != '/':
+        return
+
+    parts = text[1:].split(None, 1)
+    if not parts:
+        return
+    # /status@MonBot -> status
+    name = parts[0].split('@', 1)[0].lower()
+    spec = COMMANDS.get(name)
+    if spec is None:
+        return
+
+    if spec['admin'] and ADMIN_ID != 0 and event.sender_id != ADMIN_ID:
+        if spec['deny_message']:
+            await event.respond(spec['deny_message'])
+        return
+
+    args = parts[1].strip() if len(parts) > 1 else ''
+    metrics = command_metrics[name]
+    started = time_module.perf_counter()
     try:
-        val = int(event.pattern_match.group(1))
-        USER_A = val
-        await event.respond(f"✅ Valeur de 'a' mise à jour : {USER_A}")
+        await spec['handler'](event, args)
     except Exception as e:
-        await event.respond(f"❌ Erreur: {e}")
+        metrics['errors'] += 1
+        logger.error(f"Erreur commande /{name}: {e}")
+    finally:
+        elapsed_ms = (time_module.perf_counter() - started) * 1000
+        metrics['calls'] += 1
+        metrics['total_ms'] += elapsed_ms
+        metrics['max_ms'] = max(metrics['max_ms'], elapsed_ms)
 
-@client.on(events.NewMessage(pattern=r'^/set_a (\d+)$'))
-async def cmd_set_a(event):
-    if event.is_group or event.is_channel: return
-    if event.sender_id != ADMIN_ID and ADMIN_ID != 0: return
+# --- Commandes Administrateur ---
+
+@command('start', admin=False)
+async def cmd_start(event, args):
+    await event.respond("🤖 **Bot de Prédiction Baccarat**\n\nCommandes: `/status`, `/help`, `/debug`, `/checkchannels`")
 
+@command('a')
+async def cmd_set_a_shortcut(event, args):
     global USER_A
-    try:
-        val = int(event.pattern_match.group(1))
-        USER_A = val
-        await event.respond(f"✅ Valeur de 'a' mise à jour : {USER_A}\nLes prochaines prédictions seront sur le jeu N+{USER_A}")
-    except Exception as e:
-        await event.respond(f"❌ Erreur: {e}")
+    if not args.isdigit():
+        await event.respond("Usage: `/a <entier>`")
+        return
+    USER_A = int(args)
+    mark_state_dirty()
+    await event.respond(f"✅ Valeur de 'a' mise à jour : {USER_A}")
 
-@client.on(events.NewMessage(pattern='/status'))
-async def cmd_status(event):
-    if event.is_group or event.is_channel: return
-    if event.sender_id != ADMIN_ID and ADMIN_ID != 0:
-        await event.respond("Commande réservée à l'administrateur")
+@command('set_a')
+async def cmd_set_a(event, args):
+    global USER_A
+    if not args.isdigit():
+        await event.respond("Usage: `/set_a <entier>`")
         return
+    USER_A = int(args)
+    mark_state_dirty()
+    await event.respond(f"✅ Valeur de 'a' mise à jour : {USER_A}\nLes prochaines prédictions seront sur le jeu N+{USER_A}")
+
+@command('status', deny_message="Commande réservée à l'administrateur")
+async def cmd_status(event, args):
+    # Copie de l'état sur la boucle (rapide), rendu du texte dans le pool des rapports
+    state = {
+        'current_game_number': current_game_number,
+        'user_a': USER_A,
+        'strategy': STRATEGY,
+        'suit_consecutive_counts': dict(suit_consecutive_counts),
+        'suit_block_until': dict(suit_block_until),
+        'local_stats': local_suit_stats.stats(),
+        'local_stats_games': local_suit_stats.filled,
+        'pending_predictions': {game: dict(pred) for game, pred in pending_predictions.items()},
+        'loop': loop_monitor.report(),
+        'role': ha_role_description(),
+    }
+    status_msg = await report_pool.run(render_status, state)
+    await event.respond(status_msg)
+
+def render_status(state: dict) -> str:
+    """Construit le message /status à partir d'une copie de l'état (exécuté hors boucle)."""
+    strategy = state['strategy']
+    current_game = state['current_game_number']
+    now = datetime.now()
 
     status_msg = f"📊 **État du Bot:**\n\n"
-    status_msg += f"🎮 Jeu actuel (Source 1): #{current_game_number}\n"
-    status_msg += f"🔢 Paramètre 'a': {USER_A}\n\n"
+    status_msg += f"🎮 Jeu actuel (Source 1): #{current_game}\n"
+    status_msg += f"🔢 Paramètre 'a': {state['user_a']}\n"
+    status_msg += f"🛡️ Instance: {state['role']}\n\n"
 
     # Afficher les compteurs de prédictions consécutives
-    if suit_consecutive_counts:
+    suit_block_until_copy = state['suit_block_until']
+    if state['suit_consecutive_counts']:
         status_msg += f"**📈 Compteurs de prédictions:**\n"
-        for suit, count in suit_consecutive_counts.items():
-            blocked = "🔒" if suit in suit_block_until and datetime.now() < suit_block_until.get(suit, datetime.min) else ""
-            status_msg += f"• {suit}: {count}/3 {blocked}\n"
+        for suit, count in state['suit_consecutive_counts'].items():
+            blocked = "🔒" if suit in suit_block_until_copy and now < suit_block_until_copy.get(suit, datetime.min) else ""
+            status_msg += f"• {suit}: {count}/{strategy.max_consecutive} {blocked}\n"
 
     # Afficher les blocages actifs
-    if suit_block_until:
+    if suit_block_until_copy:
         status_msg += f"\n**🔒 Blocages actifs:**\n"
-        for suit, block_time in suit_block_until.items():
-            if datetime.now() < block_time:
-                remaining = block_time - datetime.now()
+        for suit, block_time in suit_block_until_copy.items():
+            if now < block_time:
+                remaining = block_time - now
                 status_msg += f"• {suit}: {remaining.seconds//60}min {remaining.seconds%60}s restantes\n"
 
+    # Compteurs locaux (Source 1)
+    if state['local_stats_games']:
+        local_counts = " ".join(f"{SUIT_DISPLAY[suit]}{count}" for suit, count in state['local_stats'].items())
+        status_msg += f"\n**🧮 Compteurs locaux ({state['local_stats_games']} jeux, mode {strategy.stats_source}):**\n"
+        status_msg += f"• {local_counts}\n"
+
+    # Retard de la boucle asyncio
+    loop_report = state['loop']
+    status_msg += f"\n**🐢 Boucle asyncio:**\n"
+    status_msg += f"• Retard moy {loop_report['avg_lag_ms']}ms, max {loop_report['max_lag_ms']}ms, blocages {loop_report['slow_events']}\n"
+
     # --- NOUVELLE INFO: Statut horaire ---
     can_predict, time_msg = is_prediction_time_allowed()
     status_msg += f"\n**⏰ Fenêtre horaire:**\n"
     status_msg += f"• {time_msg}\n"
 
-    if pending_predictions:
-        status_msg += f"\n**🔮 Actives ({len(pending_predictions)}):**\n"
-        for game_num, pred in sorted(pending_predictions.items()):
-            distance = game_num - current_game_number
-            ratt = f" (R{pred['rattrapage']})" if pred.get('rattrapage', 0) > 0 else ""
+    pending = state['pending_predictions']
+    if pending:
+        status_msg += f"\n**🔮 Actives ({len(pending)}):**\n"
+        for game_num, pred in sorted(pending.items()):
+            rattrapage = pred.get('rattrapage', 0)
+            distance = game_num + rattrapage - current_game
+            ratt = f" (R{rattrapage} → #{game_num + rattrapage})" if rattrapage > 0 else ""
             status_msg += f"• #{game_num}{ratt}: {pred['suit']} - {pred['status']} (dans {distance})\n"
     else: status_msg += "\n**🔮 Aucune prédiction active**\n"
 
-    await event.respond(status_msg)
+    return status_msg
 
-@client.on(events.NewMessage(pattern='/help'))
-async def cmd_help(event):
-    if event.is_group or event.is_channel: return
+@command('help', admin=False)
+async def cmd_help(event, args):
+    strategy = STRATEGY
+    if strategy.blocked_from_minute < 60:
+        time_window = f"Prédictions bloquées de H:{strategy.blocked_from_minute:02d} à H:59"
+    else:
+        time_window = "Aucun blocage horaire"
     await event.respond(f"""📖 **Aide - Bot de Prédiction V3**
 
 **Règles de prédiction :**
 1. Surveille le **Canal Source 2** (Stats).
-2. Si un décalage d'au moins **10 jeux** existe entre deux cartes :
+2. Si un décalage d'au moins **{strategy.diff_threshold} jeux** existe entre deux cartes :
    - Prédit la carte en avance.
    - Cible le jeu : **Dernier numéro Source 1 + a**.
 3. **Rattrapages :** Si la carte ne sort pas au jeu cible, le bot retente sur les **3 jeux suivants** (3 rattrapages).
-4. **Blocage (MAX 3) :** Maximum 3 prédictions consécutives du même costume:
-   - Après 3 prédictions du même costume → Bloqué jusqu'à changement de costume OU 30min
+   - Résultats traités dans l'ordre des jeux; un jeu manquant depuis {strategy.reorder_hold_seconds}s compte comme un rattrapage échoué.
+4. **Blocage (MAX {strategy.max_consecutive}) :** Maximum {strategy.max_consecutive} prédictions consécutives du même costume:
+   - Après {strategy.max_consecutive} prédictions du même costume → Bloqué jusqu'à changement de costume OU {strategy.consecutive_block_minutes}min
    - Si changement de costume détecté → Réinitialise le compteur
-   - Si 30min écoulées → Peut prédire à nouveau
-5. **⏰ Fenêtre horaire :** Prédictions autorisées de H:00 à H:39, bloquées de H:40 à H:59
+   - Si {strategy.consecutive_block_minutes}min écoulées → Peut prédire à nouveau
+5. **⏰ Fenêtre horaire :** {time_window}
 
 **Commandes :**
 - `/status` : Affiche l'état actuel.
 - `/set_a <valeur>` : Modifie l'entier 'a' (par défaut 1).
+- `/memory [start|snapshot|diff|stop]` : Diagnostic mémoire (tracemalloc).
+- `/metrics` : Latence des commandes et de la boucle asyncio.
+- `/archive <N>` : Messages sources archivés du jeu N.
+- `/reload` : Recharge la stratégie ({STRATEGY_FILE}).
 - `/debug` : Infos techniques.
 """)
 
+@command('metrics')
+async def cmd_metrics(event, args):
+    msg = "⏱️ **Latence des commandes:**\n\n"
+    for name, metrics in sorted(command_metrics.items()):
+        if metrics['calls'] == 0:
+            continue
+        avg_ms = metrics['total_ms'] / metrics['calls']
+        msg += f"• /{name}: {metrics['calls']} appels, moy {avg_ms:.1f}ms, max {metrics['max_ms']:.1f}ms, erreurs {metrics['errors']}\n"
+
+    loop_report = loop_monitor.report()
+    msg += f"\n🐢 **Boucle asyncio:**\n"
+    msg += f"• Retard: dernier {loop_report['last_lag_ms']}ms, moy {loop_report['avg_lag_ms']}ms, max {loop_report['max_lag_ms']}ms\n"
+    msg += f"• Blocages > {SLOW_CALLBACK_MS}ms: {loop_report['slow_events']}\n"
+    if loop_report['last_slow']:
+        last_slow = loop_report['last_slow']
+        msg += f"• Dernier: {last_slow['at']} {last_slow['blocked_ms']}ms par {last_slow['coroutine']} ({last_slow['location']})\n"
+
+    msg += f"\n🧵 **Pools:**\n"
+    for pool in (report_pool, io_pool):
+        pool_report = pool.report()
+        msg += f"• {pool.name}: {pool_report['completed']} tâches, {pool_report['active']} en cours, moy {pool_report['avg_ms']}ms, max {pool_report['max_ms']}ms\n"
+
+    msg += f"\n🔀 **Remise en ordre Source 1:**\n"
+    msg += f"• Prochain jeu attendu: #{result_buffer.next_game if result_buffer.next_game is not None else '-'}, {len(result_buffer.held)} résultat(s) retenu(s)\n"
+    msg += f"• Doublons ignorés: {result_buffer.duplicates}, jeux manquants: {result_buffer.gaps}\n"
+    await event.respond(msg)
+
+@command('archive')
+async def cmd_archive(event, args):
+    if message_archive is None:
+        await event.respond("❌ Archive désactivée (ARCHIVE_DIR vide)")
+        return
+    if not args.isdigit():
+        await event.respond("Usage: `/archive <numéro de jeu>`")
+        return
+
+    game_number = int(args)
+    # Les messages pas encore écrits sont copiés sur la boucle, la lecture disque se fait dans le pool
+    pending = message_archive.pending_records(game_number)
+    records = await report_pool.run(message_archive.read_game, game_number, pending)
+    if not records:
+        await event.respond(f"📦 Aucun message archivé pour le jeu #{game_number}")
+        return
+
+    msg = f"📦 **Jeu #{game_number}: {len(records)} message(s)**\n\n"
+    for record in records[-5:]:
+        when = datetime.fromtimestamp(record['ts']).strftime('%H:%M:%S')
+        kind = "✏️" if record['edited'] else "🆕"
+        msg += f"{kind} {when} ({record['chat_id']}): {record['text'][:200]}\n\n"
+    await event.respond(msg)
+
+@command('reload')
+async def cmd_reload(event, args):
+    ok, message = reload_strategy()
+    msg = f"{'✅' if ok else '❌'} {message}\n\n"
+    for name, value in vars(STRATEGY).items():
+        msg += f"• {name}: {dict(value) if name == 'suit_mapping' else value}\n"
+    await event.respond(msg)
+
+
+# --- Diagnostics Mémoire ---
+
+def get_state_sizes() -> dict:
+    """
+    Retourne la taille des structures internes du bot (et du cache Telethon).
+
+    Parcourt des structures modifiées par les handlers : à appeler sur la boucle asyncio,
+    jamais depuis report_pool.
+    """
+    sizes = {
+        'pending_predictions': len(pending_predictions),
+        'queued_predictions': len(queued_predictions),
+        'recent_games': len(recent_games),
+        'processed_messages': len(processed_messages),
+        'suit_consecutive_counts': len(suit_consecutive_counts),
+        'suit_results_history': sum(len(h) for h in suit_results_history.values()),
+        'suit_block_until': len(suit_block_until),
+        'suit_first_prediction_time': len(suit_first_prediction_time),
+        'local_suit_stats_games': local_suit_stats.filled,
+        'reorder_held_results': len(result_buffer.held),
+        'background_tasks': len(background_tasks),
+    }
+    if message_archive is not None:
+        sizes['archive_pending_games'] = len(message_archive.pending)
+    # Caches internes de Telethon (attributs privés, absents selon les versions)
+    entity_cache = getattr(client, '_mb_entity_cache', None)
+    if entity_cache is not None and hasattr(entity_cache, 'hash_map'):
+        sizes['telethon_entity_cache'] = len(entity_cache.hash_map)
+    session_entities = getattr(client.session, '_entities', None)
+    if session_entities is not None:
+        sizes['telethon_session_entities'] = len(session_entities)
+    return sizes
+
+def _take_memory_snapshot():
+    """Prend un snapshot tracemalloc en excluant les allocations de tracemalloc lui-même."""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+def memory_report(state_sizes: dict, action: str = 'status', limit: int = 10) -> dict:
+    """
+    Pilote tracemalloc et construit un rapport mémoire (exécuté dans report_pool).
+
+    state_sizes: résultat de get_state_sizes(), calculé sur la boucle par l'appelant
+
+    Actions:
+    - start    : démarre tracemalloc et prend le snapshot de référence
+    - snapshot : remplace le snapshot de référence et retourne le top des allocations
+    - diff     : compare l'état actuel au snapshot de référence (top par fichier:ligne)
+    - stop     : arrête tracemalloc et libère le snapshot
+    - status   : tailles des structures seulement
+
+    Returns:
+        dict: rapport sérialisable en JSON
+    """
+    global memory_baseline_snapshot
+
+    # Actions exécutées une à une : report_pool a plusieurs threads et
+    # start/stop/snapshot/diff partagent tracemalloc et le snapshot de référence
+    with memory_report_lock:
+        report = {'action': action, 'tracing': tracemalloc.is_tracing()}
+
+        if action == 'start':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(MEMORY_TRACE_FRAMES)
+            memory_baseline_snapshot = _take_memory_snapshot()
+            report['tracing'] = True
+        elif action == 'stop':
+            tracemalloc.stop()
+            memory_baseline_snapshot = None
+            report['tracing'] = False
+        elif action in ('snapshot', 'diff'):
+            if not tracemalloc.is_tracing():
+                report['error'] = "tracemalloc inactif (utilisez l'action 'start')"
+            elif action == 'snapshot' or memory_baseline_snapshot is None:
+                memory_baseline_snapshot = _take_memory_snapshot()
+                report['top'] = [
+                    {'location': str(stat.traceback[0]), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+                    for stat in memory_baseline_snapshot.statistics('lineno')[:limit]
+                ]
+            else:
+                current = _take_memory_snapshot()
+                report['diff'] = [
+                    {
+                        'location': str(stat.traceback[0]),
+                        'size_diff_kb': round(stat.size_diff / 1024, 1),
+                        'size_kb': round(stat.size / 1024, 1),
+                        'count_diff': stat.count_diff,
+                    }
+                    for stat in current.compare_to(memory_baseline_snapshot, 'lineno')[:limit]
+                ]
+        elif action != 'status':
+            report['error'] = f"Action inconnue: {action}"
+
+        if tracemalloc.is_tracing():
+            current_size, peak_size = tracemalloc.get_traced_memory()
+            report['traced_kb'] = round(current_size / 1024, 1)
+            report['peak_kb'] = round(peak_size / 1024, 1)
+    report['state_sizes'] = state_sizes
+    return report
+
+@command('memory')
+async def cmd_memory(event, args):
+    action = args.split(None, 1)[0].lower() if args else 'status'
+    report = await report_pool.run(memory_report, get_state_sizes(), action, limit=10)
+
+    msg = f"🧠 **Mémoire ({action}):**\n\n"
+    if 'error' in report:
+        msg += f"❌ {report['error']}\n\n"
+    if 'traced_kb' in report:
+        msg += f"• Tracé: {report['traced_kb']} KB (pic {report['peak_kb']} KB)\n\n"
+    for stat in report.get('top', []):
+        msg += f"• {stat['location']}: {stat['size_kb']} KB ({stat['count']})\n"
+    for stat in report.get('diff', []):
+        msg += f"• {stat['location']}: {stat['size_diff_kb']:+} KB ({stat['count_diff']:+})\n"
+    msg += f"\n**📦 Structures:**\n"
+    for name, size in report['state_sizes'].items():
+        msg += f"• {name}: {size}\n"
+
+    await event.respond(msg)
+
 
 # --- Serveur Web et Démarrage ---
 
 async def index(request):
-    html = f"""<!DOCTYPE html><html><head><title>Bot Prédiction Baccarat</title></head><body><h1>🎯 Bot de Prédiction Baccarat</h1><p>Le bot est en ligne et surveille les canaux.</p><p><strong>Jeu actuel:</strong> #{current_game_number}</p></body></html>"""
+    html = f"""<!DOCTYPE html><html><head><title>Bot Prédiction Baccarat</title></head><body><h1>🎯 Bot de Prédiction Baccarat</h1><p>Le bot est en ligne et surveille les canaux.</p><p><strong>Jeu actuel:</strong> #{current_game_number}</p><p><strong>Instance:</strong> {ha_role_description()}</p></body></html>"""
     return web.Response(text=html, content_type='text/html', status=200)
 
 async def health_check(request):
     return web.Response(text="OK", status=200)
 
+async def debug_memory(request):
+    """Endpoint de diagnostic mémoire: /debug/memory?token=...&action=diff&limit=20"""
+    if not DEBUG_TOKEN or request.query.get('token') != DEBUG_TOKEN:
+        return web.Response(text="Forbidden", status=403)
+    try:
+        limit = int(request.query.get('limit', '20'))
+    except ValueError:
+        return web.Response(text="limit invalide", status=400)
+    report = await report_pool.run(memory_report, get_state_sizes(), request.query.get('action', 'status'), limit=limit)
+    return web.json_response(report, status=400 if 'error' in report else 200)
+
+async def debug_loop(request):
+    """Endpoint de diagnostic de la boucle asyncio: /debug/loop?token=..."""
+    if not DEBUG_TOKEN or request.query.get('token') != DEBUG_TOKEN:
+        return web.Response(text="Forbidden", status=403)
+    return web.json_response({
+        'loop': loop_monitor.report(),
+        'pools': {pool.name: pool.report() for pool in (report_pool, io_pool)},
+        'commands': command_metrics,
+    })
+
 async def start_web_server():
     """Démarre le serveur web pour la vérification de l'état (health check)."""
     app = web.Application()
     app.router.add_get('/', index)
     app.router.add_get('/health', health_check)
+    app.router.add_get('/debug/memory', debug_memory)
+    app.router.add_get('/debug/loop', debug_loop)
 
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, '0.0.0.0', PORT)
     await site.start() 
 
+# --- Rechargement à chaud de la stratégie ---
+
+def reload_strategy() -> tuple[bool, str]:
+    """
+    Recharge STRATEGY_FILE et remplace STRATEGY si la configuration est valide.
+
+    Returns:
+        (bool, str): (rechargé, message explicatif)
+    """
+    global STRATEGY, strategy_file_mtime, local_suit_stats
+    try:
+        strategy_file_mtime = os.path.getmtime(STRATEGY_FILE) if os.path.exists(STRATEGY_FILE) else None
+        new_strategy = load_strategy(STRATEGY_FILE)
+    except Exception as e:
+        logger.error(f"❌ Stratégie invalide, configuration actuelle conservée: {e}")
+        return False, f"Stratégie invalide, configuration actuelle conservée: {e}"
+
+    # Une seule affectation : les handlers voient l'ancien ou le nouveau snapshot, jamais un mélange
+    STRATEGY = new_strategy
+    if local_suit_stats.size != new_strategy.local_stats_window:
+        local_suit_stats = local_suit_stats.resized(new_strategy.local_stats_window)
+    if local_suit_stats.pairs != tuple(new_strategy.mirror_pairs):
+        local_suit_stats.set_mirror_pairs(new_strategy.mirror_pairs)
+    result_buffer.hold_seconds = new_strategy.reorder_hold_seconds
+    result_buffer.max_gap = new_strategy.reorder_max_gap
+    logger.info(f"🔄 Stratégie rechargée depuis {STRATEGY_FILE}: {new_strategy}")
+    return True, f"Stratégie rechargée depuis {STRATEGY_FILE}"
+
+async def watch_strategy_file():
+    """Surveille la date de modification de STRATEGY_FILE et recharge en cas de changement."""
+    while True:
+        await asyncio.sleep(STRATEGY_POLL_SECONDS)
+        try:
+            mtime = os.path.getmtime(STRATEGY_FILE) if os.path.exists(STRATEGY_FILE) else None
+        except OSError:
+            continue
+        if mtime != strategy_file_mtime:
+            reload_strategy()
+
+# --- Haute Disponibilité (actif / standby) ---
+
+def mark_state_dirty():
+    """Signale un changement d'état à publier vers l'instance standby."""
+    global state_dirty
+    if replication_store is None:
+        return
+    state_dirty = True
+    state_changed.set()
+
+def remember_standby_result(event):
+    """Standby : garde les résultats Source 1 finalisés pour les rejouer à la prise du bail."""
+    if event.is_private or event.chat_id != SOURCE_CHANNEL_ID:
+        return
+    message_text = event.message.message
+    if not is_message_finalized(message_text):
+        return
+    game_number = extract_game_number(message_text)
+    if game_number is not None:
+        standby_recent_results.append((game_number, message_text))
+
+async def replay_standby_results():
+    """
+    Prise du bail : rejoue les résultats reçus en standby postérieurs au dernier jeu
+    répliqué, dans leur ordre d'arrivée (les doublons sont écartés par le traitement normal).
+    """
+    replayed = 0
+    for game_number, message_text in list(standby_recent_results):
+        if game_number > last_source_game_number:
+            await process_finalized_message(message_text, SOURCE_CHANNEL_ID)
+            replayed += 1
+    standby_recent_results.clear()
+    if replayed:
+        logger.warning(f"🔁 {replayed} résultat(s) Source 1 reçu(s) en standby rejoué(s)")
+        mark_state_dirty()
+
+def ha_role_description() -> str:
+    if replication_store is None:
+        return "unique"
+    return f"{'👑 active' if is_leader else '💤 standby'} ({replication_store.node_id})"
+
+def snapshot_state() -> dict:
+    """
+    Copie de l'état de prédiction, prête pour json.dumps (dates en ISO 8601).
+
+    À appeler sur la boucle asyncio; la sérialisation se fait ensuite dans ha_pool.
+    Seuls les hashs de dédoublonnage des derniers jeux sont repris : un résultat plus
+    ancien que reorder_max_gap jeux est de toute façon écarté par result_buffer.
+    """
+    oldest_game = last_source_game_number - STRATEGY.reorder_max_gap
+    return {
+        'pending_predictions': {
+            game: {**pred, 'message_ids': dict(pred['message_ids'])} if 'message_ids' in pred else dict(pred)
+            for game, pred in pending_predictions.items()
+        },
+        'queued_predictions': {game: dict(pred) for game, pred in queued_predictions.items()},
+        'processed_messages': [
+            message_hash for message_hash in processed_messages
+            if int(message_hash.split('_', 1)[0]) >= oldest_game
+        ],
+        'last_transferred_game': last_transferred_game,
+        'current_game_number': current_game_number,
+        'last_source_game_number': last_source_game_number,
+        'suit_consecutive_counts': dict(suit_consecutive_counts),
+        'suit_results_history': {suit: list(history) for suit, history in suit_results_history.items()},
+        'suit_block_until': {suit: when.isoformat() for suit, when in suit_block_until.items()},
+        'suit_first_prediction_time': {suit: when.isoformat() for suit, when in suit_first_prediction_time.items()},
+        'last_predicted_suit': last_predicted_suit,
+        'user_a': USER_A,
+        'local_suit_stats': local_suit_stats.to_dict(),
+        'result_buffer': result_buffer.to_dict(),
+    }
+
+def restore_state(payload: str):
+    """Remplace l'état de prédiction par celui publié par l'instance active."""
+    global last_transferred_game, current_game_number, last_source_game_number, last_predicted_suit
+    global USER_A, local_suit_stats, result_buffer
+
+    data = json.loads(payload)
+    # JSON transforme les clés entières (numéros de jeu) en chaînes
+    pending_predictions.clear()
+    pending_predictions.update({int(game): pred for game, pred in data['pending_predictions'].items()})
+    for pred in pending_predictions.values():
+        if 'message_ids' in pred:
+            pred['message_ids'] = {int(chat_id): msg_id for chat_id, msg_id in pred['message_ids'].items()}
+    queued_predictions.clear()
+    queued_predictions.update({int(game): pred for game, pred in data['queued_predictions'].items()})
+    processed_messages.clear()
+    processed_messages.update(data['processed_messages'])
+    suit_consecutive_counts.clear()
+    suit_consecutive_counts.update(data['suit_consecutive_counts'])
+    suit_results_history.clear()
+    suit_results_history.update(data['suit_results_history'])
+    suit_block_until.clear()
+    suit_block_until.update({suit: datetime.fromisoformat(when) for suit, when in data['suit_block_until'].items()})
+    suit_first_prediction_time.clear()
+    suit_first_prediction_time.update({suit: datetime.fromisoformat(when) for suit, when in data['suit_first_prediction_time'].items()})
+
+    last_transferred_game = data['last_transferred_game']
+    current_game_number = data['current_game_number']
+    last_source_game_number = data['last_source_game_number']
+    last_predicted_suit = data['last_predicted_suit']
+    USER_A = data['user_a']
+    local_suit_stats = SuitStatsWindow.from_dict(data['local_suit_stats'], STRATEGY.mirror_pairs)
+    if local_suit_stats.size != STRATEGY.local_stats_window:
+        local_suit_stats = local_suit_stats.resized(STRATEGY.local_stats_window)
+    # Position de remise en ordre : l'instance qui reprend attend le même jeu que l'ancienne active
+    if 'result_buffer' in data:
+        result_buffer = ResultReorderBuffer.from_dict(
+            data['result_buffer'], STRATEGY.reorder_hold_seconds, STRATEGY.reorder_max_gap, time_module.monotonic()
+        )
+
+async def sync_from_leader():
+    """Standby : recharge l'état publié s'il a changé depuis la dernière synchronisation."""
+    global replicated_version
+    version = await ha_pool.run(replication_store.state_version)
+    if version == replicated_version:
+        return
+    version, payload = await ha_pool.run(replication_store.load)
+    if payload is not None:
+        restore_state(payload)
+    replicated_version = version
+
+async def publish_state() -> bool:
+    """Actif : publie l'état courant. Returns: False si le bail a été perdu entre-temps."""
+    global state_dirty, replicated_version
+    state_dirty = False
+    # Copie sur la boucle (rapide), json.dumps et écriture SQLite dans ha_pool
+    payload = await ha_pool.run(json.dumps, snapshot_state(), ensure_ascii=False)
+    version = await ha_pool.run(replication_store.publish, payload)
+    if version is None:
+        return False
+    replicated_version = version
+    return True
+
+async def high_availability_loop():
+    """
+    Renouvelle le bail de leadership et réplique l'état.
+
+    - Actif : publie l'état dès qu'il change (au plus tard toutes les HA_SYNC_SECONDS).
+    - Standby : recharge l'état publié et prend le bail dès qu'il expire; les
+      messages de prédiction existants (message_id répliqués) sont alors édités
+      au lieu d'être renvoyés.
+    """
+    global is_leader
+
+    last_lease_ok = 0.0
+    next_renew = 0.0
+    while True:
+        now = time_module.monotonic()
+        if now >= next_renew:
+            next_renew = now + HA_RENEW_SECONDS
+            try:
+                acquired = await ha_pool.run(replication_store.try_acquire)
+            except Exception as e:
+                logger.error(f"Erreur renouvellement du bail: {e}")
+                # On reste actif tant que le dernier bail obtenu n'a pas expiré
+                acquired = is_leader and now - last_lease_ok < HA_LEASE_SECONDS
+            else:
+                if acquired:
+                    last_lease_ok = now
+
+            if acquired and not is_leader:
+                try:
+                    await sync_from_leader()
+                except Exception as e:
+                    logger.error(f"Erreur chargement de l'état répliqué: {e}")
+                if message_archive is not None:
+                    message_archive.refresh_segment()
+                is_leader = True
+                # Résultats arrivés après la dernière publication de l'ancienne active
+                await replay_standby_results()
+                # Résultats retenus par l'ancienne active : libérés à l'expiration de leur délai
+                schedule_reorder_drain()
+                logger.warning(f"👑 Instance {replication_store.node_id} active (état v{replicated_version}, {len(pending_predictions)} prédictions en cours)")
+            elif not acquired and is_leader:
+                is_leader = False
+                logger.warning(f"💤 Bail perdu, instance {replication_store.node_id} en standby")
+
+        try:
+            if is_leader:
+                if state_dirty and not await publish_state():
+                    is_leader = False
+                    logger.warning(f"💤 Bail perdu pendant la publication, instance {replication_store.node_id} en standby")
+            else:
+                await sync_from_leader()
+        except Exception as e:
+            logger.error(f"Erreur réplication: {e}")
+
+        try:
+            await asyncio.wait_for(state_changed.wait(), timeout=HA_SYNC_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        state_changed.clear()
+
+async def stop_high_availability():
+    """Arrêt propre : dernière publication puis libération du bail pour une bascule immédiate."""
+    if replication_store is None or not is_leader:
+        return
+    try:
+        await publish_state()
+        await ha_pool.run(replication_store.release)
+        logger.info("Bail de leadership libéré")
+    except Exception as e:
+        logger.error(f"Erreur libération du bail: {e}")
+
+# --- Archive des messages sources ---
+
+async def archive_flush_loop():
+    """Écrit périodiquement les messages archivés, par lots, hors de la boucle asyncio."""
+    while True:
+        await asyncio.sleep(ARCHIVE_FLUSH_SECONDS)
+        try:
+            await message_archive.flush(run_blocking=io_pool.run)
+        except Exception as e:
+            logger.error(f"Erreur écriture archive: {e}")
+
 async def schedule_daily_reset():
-    """Tâche planifiée pour la réinitialisation quotidienne des stocks de prédiction à 00h59 WAT."""
-    wat_tz = timezone(timedelta(hours=1)) 
-    reset_time = time(0, 59, tzinfo=wat_tz)
+    """
+    Tâche planifiée pour la réinitialisation quotidienne des stocks de prédiction à 00h59 WAT.
 
-    logger.info(f"Tâche de reset planifiée pour {reset_time} WAT.")
+    L'heure vient de la stratégie; elle est relue au moins chaque minute pour
+    prendre en compte un rechargement pendant l'attente.
+    """
+    logger.info(f"Tâche de reset planifiée pour {STRATEGY.reset_hour:02d}h{STRATEGY.reset_minute:02d} (UTC{STRATEGY.reset_utc_offset_hours:+d}).")
 
     while True:
-        now = datetime.now(wat_tz)
-        target_datetime = datetime.combine(now.date(), reset_time, tzinfo=wat_tz)
+        strategy = STRATEGY
+        reset_tz = timezone(timedelta(hours=strategy.reset_utc_offset_hours))
+        reset_time = time(strategy.reset_hour, strategy.reset_minute, tzinfo=reset_tz)
+
+        now = datetime.now(reset_tz)
+        target_datetime = datetime.combine(now.date(), reset_time, tzinfo=reset_tz)
         if now >= target_datetime:
             target_datetime += timedelta(days=1)
 
         time_to_wait = (target_datetime - now).total_seconds()
 
-        logger.info(f"Prochain reset dans {timedelta(seconds=time_to_wait)}")
+        if time_to_wait > 60:
+            logger.debug(f"Prochain reset ({reset_time}) dans {timedelta(seconds=time_to_wait)}")
+            await asyncio.sleep(60)
+            continue
+
         await asyncio.sleep(time_to_wait)
 
-        logger.warning("🚨 RESET QUOTIDIEN À 00h59 WAT DÉCLENCHÉ!")
+        logger.warning(f"🚨 RESET QUOTIDIEN À {reset_time.strftime('%Hh%M')} (UTC{strategy.reset_utc_offset_hours:+d}) DÉCLENCHÉ!")
 
         global pending_predictions, queued_predictions, recent_games, processed_messages, last_transferred_game, current_game_number, last_source_game_number
-        global suit_consecutive_counts, suit_results_history, suit_block_until, last_predicted_suit, suit_first_prediction_time
-
-        pending_predictions.clear()
-        queued_predictions.clear()
-        recent_games.clear()
-        processed_messages.clear()
-        suit_consecutive_counts.clear()
-        suit_results_history.clear()
-        suit_block_until.clear()
-        suit_first_prediction_time.clear()
-        last_transferred_game = None
-        current_game_number = 0
-        last_source_game_number = 0
-        last_predicted_suit = None
+        global suit_consecutive_counts, suit_results_history, suit_block_until, last_predicted_suit, suit_first_prediction_time, reorder_timer
+
+        # Sous results_lock : un traitement de résultats en cours (en attente d'une édition)
+        # ne peut pas réécrire les numéros de la veille après le reset
+        async with results_lock:
+            if reorder_timer is not None:
+                reorder_timer.cancel()
+                reorder_timer = None
+            pending_predictions.clear()
+            queued_predictions.clear()
+            recent_games.clear()
+            processed_messages.clear()
+            suit_consecutive_counts.clear()
+            suit_results_history.clear()
+            suit_block_until.clear()
+            suit_first_prediction_time.clear()
+            local_suit_stats.clear()
+            result_buffer.clear()
+            fanout_send_tasks.clear()
+            last_transferred_game = None
+            current_game_number = 0
+            last_source_game_number = 0
+            last_predicted_suit = None
 
         logger.warning("✅ Toutes les données de prédiction ont été effacées.")
+        mark_state_dirty()
+
+        # Les numéros de jeu recommencent : nouvelle journée d'archive
+        if message_archive is not None:
+            try:
+                await message_archive.flush(force=True, new_day=True, run_blocking=io_pool.run)
+            except Exception as e:
+                logger.error(f"Erreur rotation archive: {e}")
 
 async def start_bot():
     """Démarre le client Telegram et les vérifications initiales."""
@@ -781,6 +1640,9 @@ async def start_bot():
 async def main():
     """Fonction principale pour lancer le serveur web, le bot et la tâche de reset."""
     try:
+        # Surveillance du retard de la boucle (avant tout le reste pour couvrir le démarrage)
+        loop_monitor.start()
+
         await start_web_server()
 
         success = await start_bot()
@@ -789,7 +1651,15 @@ async def main():
             return
 
         # Lancement de la tâche de reset en arrière-plan
-        asyncio.create_task(schedule_daily_reset())
+        start_background_task(schedule_daily_reset())
+        # Rechargement à chaud de la stratégie
+        start_background_task(watch_strategy_file())
+        # Écriture par lots de l'archive des messages sources
+        if message_archive is not None:
+            start_background_task(archive_flush_loop())
+        # Bail de leadership et réplication de l'état (mode actif / standby)
+        if replication_store is not None:
+            start_background_task(high_availability_loop())
 
         logger.info("Bot complètement opérationnel - En attente de messages...")
         await client.run_until_disconnected()
@@ -799,8 +1669,19 @@ async def main():
         import traceback
         logger.error(traceback.format_exc())
     finally:
+        loop_monitor.stop()
+        await stop_high_availability()
+        if message_archive is not None:
+            try:
+                await message_archive.flush(force=True, run_blocking=io_pool.run)
+            except Exception as e:
+                logger.error(f"Erreur écriture archive: {e}")
         if client.is_connected():
             await client.disconnect()
+        report_pool.shutdown()
+        io_pool.shutdown()
+        if replication_store is not None:
+            ha_pool.shutdown()
 
 if __name__ == '__main__':
     try:
@@ -0,0 +1,136 @@
+# =========================================
+# Remise en ordre des résultats Source 1 (arrivées en avance, doublons, trous)
+# =========================================
+
+# Nombre de numéros consécutifs très inférieurs au prochain attendu avant de conclure
+# que la numérotation est repartie de plus bas (un seul suffit pour une édition tardive)
+RESTART_CONFIRMATIONS = 3
+
+class ResultReorderBuffer:
+    """
+    Tampon de réordonnancement des résultats, indexé par numéro de jeu.
+
+    Les résultats sont libérés strictement dans l'ordre des numéros. Un résultat
+    arrivé en avance (#N+2 avant #N+1) est retenu au plus `hold_seconds`; passé ce
+    délai, les numéros manquants sont libérés comme trous (payload None) pour que
+    les rattrapages qui les attendaient avancent. Les doublons et les résultats
+    arrivés après leur libération sont ignorés, y compris un numéro très inférieur
+    au prochain attendu : seule une suite de RESTART_CONFIRMATIONS numéros consécutifs
+    (note_restart_candidate) signale une numérotation remise à zéro.
+    """
+
+    def __init__(self, hold_seconds: float, max_gap: int):
+        self.hold_seconds = hold_seconds
+        # Au-delà de max_gap numéros d'écart, on resynchronise au lieu de signaler des trous
+        # (redémarrage du bot, numérotation remise à zéro)
+        self.max_gap = max_gap
+        self.next_game = None
+        # jeu -> (payload, heure d'arrivée time.monotonic)
+        self.held = {}
+        # Numéros consécutifs très inférieurs au prochain attendu : [(jeu, payload), ...]
+        self.restart_candidates = []
+        self.duplicates = 0
+        self.gaps = 0
+
+    def push(self, game_number: int, payload, now: float) -> list:
+        """
+        Ajoute un résultat et retourne ceux qui peuvent être traités.
+
+        Returns:
+            list: [(numéro de jeu, payload ou None pour un jeu manquant), ...] dans l'ordre
+        """
+        if self.next_game is None:
+            self.next_game = game_number
+        elif game_number < self.next_game:
+            # Déjà libéré (doublon, édition tardive ou arrivé après le délai)
+            self.duplicates += 1
+            return []
+        if game_number in self.held:
+            self.duplicates += 1
+            return []
+
+        # La séquence en cours continue : les candidats à une remise à zéro étaient des retards
+        self.restart_candidates.clear()
+        self.held[game_number] = (payload, now)
+        return self.drain(now)
+
+    def is_new_sequence(self, game_number: int) -> bool:
+        """True si le numéro est assez en dessous du prochain attendu pour signaler une remise à zéro."""
+        return self.next_game is not None and self.next_game - game_number > self.max_gap
+
+    def note_restart_candidate(self, game_number: int, payload):
+        """
+        Enregistre un numéro pour lequel is_new_sequence est vrai.
+
+        Returns:
+            list | None: [(jeu, payload), ...] de la nouvelle séquence une fois
+            RESTART_CONFIRMATIONS numéros consécutifs reçus, sinon None (traité comme un doublon)
+        """
+        candidates = self.restart_candidates
+        if candidates and game_number == candidates[-1][0]:
+            self.duplicates += 1
+            return None
+        if candidates and game_number != candidates[-1][0] + 1:
+            candidates.clear()
+        candidates.append((game_number, payload))
+        if len(candidates) < RESTART_CONFIRMATIONS:
+            self.duplicates += 1
+            return None
+        confirmed = list(candidates)
+        candidates.clear()
+        return confirmed
+
+    def start_at(self, game_number: int):
+        """Fixe le prochain jeu attendu si le tampon n'a pas encore de position (reprise)."""
+        if self.next_game is None:
+            self.next_game = game_number
+
+    def drain(self, now: float, force: bool = False) -> list:
+        """Libère les résultats consécutifs, et les trous dont le délai d'attente est écoulé."""
+        released = []
+        while self.held:
+            if self.next_game in self.held:
+                payload, _ = self.held.pop(self.next_game)
+                released.append((self.next_game, payload))
+                self.next_game += 1
+                continue
+
+            first_held = min(self.held)
+            oldest_arrival = min(arrival for _, arrival in self.held.values())
+            if not force and now - oldest_arrival < self.hold_seconds:
+                break
+            if first_held - self.next_game <= self.max_gap:
+                for missing in range(self.next_game, first_held):
+                    released.append((missing, None))
+                    self.gaps += 1
+            self.next_game = first_held
+        return released
+
+    def seconds_until_release(self, now: float):
+        """Délai avant la prochaine libération forcée, None si rien n'est retenu."""
+        if not self.held:
+            return None
+        oldest_arrival = min(arrival for _, arrival in self.held.values())
+        return max(0.0, oldest_arrival + self.hold_seconds - now)
+
+    def to_dict(self) -> dict:
+        """État sérialisable en JSON (réplication)."""
+        return {
+            'next_game': self.next_game,
+            'held': {str(game): payload for game, (payload, _) in self.held.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, hold_seconds: float, max_gap: int, now: float) -> 'ResultReorderBuffer':
+        # Les heures d'arrivée (time.monotonic) ne sont pas transposables d'un processus
+        # à l'autre : le délai d'attente des résultats retenus repart de `now`
+        buffer = cls(hold_seconds, max_gap)
+        buffer.next_game = data['next_game']
+        buffer.held = {int(game): (payload, now) for game, payload in data['held'].items()}
+        return buffer
+
+    def clear(self):
+        """Vide le tampon (reset quotidien)."""
+        self.next_game = None
+        self.held.clear()
+        self.restart_candidates.clear()
@@ -0,0 +1,124 @@
+import sqlite3
+import time
+
+# =========================================
+# Haute disponibilité : bail de leadership et réplication d'état via SQLite
+# =========================================
+#
+# Deux processus du bot partagent un fichier SQLite :
+#   - table lease : une ligne 'leader' (détenteur, expiration). Le détenteur la renouvelle
+#     régulièrement; si elle expire, l'autre processus la prend et devient actif.
+#   - table state : le dernier état du bot publié par l'actif (JSON + numéro de version).
+#     La publication vérifie le bail dans la même transaction : un ancien actif dont le bail
+#     a expiré ne peut plus écraser l'état du nouveau.
+#
+# Toutes les méthodes sont bloquantes : les appeler depuis un thread (BlockingPool).
+
+class ReplicationStore:
+    """Bail de leadership et dernier état publié, dans un fichier SQLite partagé."""
+
+    def __init__(self, db_path: str, node_id: str, lease_seconds: float):
+        self.db_path = db_path
+        self.node_id = node_id
+        self.lease_seconds = lease_seconds
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS lease (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS state (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL, holder TEXT NOT NULL, payload TEXT NOT NULL, updated_at REAL NOT NULL)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None : transactions explicites (BEGIN IMMEDIATE) pour verrouiller en écriture
+        return sqlite3.connect(self.db_path, timeout=2, isolation_level=None)
+
+    def _holds_lease(self, conn: sqlite3.Connection, now: float) -> bool:
+        row = conn.execute("SELECT holder, expires_at FROM lease WHERE name = 'leader'").fetchone()
+        return row is not None and row[0] == self.node_id and row[1] > now
+
+    def try_acquire(self) -> bool:
+        """Prend ou renouvelle le bail. Returns: True si ce processus est le leader."""
+        conn = self._connect()
+        try:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT holder, expires_at FROM lease WHERE name = 'leader'").fetchone()
+            if row is None or row[0] == self.node_id or row[1] <= now:
+                conn.execute(
+                    "INSERT OR REPLACE INTO lease (name, holder, expires_at) VALUES ('leader', ?, ?)",
+                    (self.node_id, now + self.lease_seconds)
+                )
+                conn.execute("COMMIT")
+                return True
+            conn.execute("COMMIT")
+            return False
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def release(self):
+        """Libère le bail (arrêt propre) pour une bascule immédiate."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM lease WHERE name = 'leader' AND holder = ?", (self.node_id,))
+        finally:
+            conn.close()
+
+    def leader(self) -> tuple:
+        """Returns: (détenteur, expiration) du bail, ou (None, 0)."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT holder, expires_at FROM lease WHERE name = 'leader'").fetchone()
+            return (row[0], row[1]) if row else (None, 0)
+        finally:
+            conn.close()
+
+    def publish(self, payload: str):
+        """
+        Publie l'état si ce processus détient toujours le bail.
+
+        Returns:
+            int | None: nouvelle version, None si le bail n'est plus détenu
+        """
+        conn = self._connect()
+        try:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            if not self._holds_lease(conn, now):
+                conn.execute("COMMIT")
+                return None
+            row = conn.execute("SELECT version FROM state WHERE id = 1").fetchone()
+            version = (row[0] if row else 0) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO state (id, version, holder, payload, updated_at) VALUES (1, ?, ?, ?, ?)",
+                (version, self.node_id, payload, now)
+            )
+            conn.execute("COMMIT")
+            return version
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def state_version(self) -> int:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT version FROM state WHERE id = 1").fetchone()
+            return row[0] if row else 0
+        finally:
+            conn.close()
+
+    def load(self) -> tuple:
+        """Returns: (version, payload) du dernier état publié, ou (0, None)."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT version, payload FROM state WHERE id = 1").fetchone()
+            return (row[0], row[1]) if row else (0, None)
+        finally:
+            conn.close()
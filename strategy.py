@@ -0,0 +1,142 @@
+import os
+from dataclasses import dataclass, field, fields, replace
+from types import MappingProxyType
+from typing import Mapping
+
+import yaml
+
+from config import SUIT_MAPPING, ALL_SUITS
+
+# =========================================
+# Paramètres de stratégie rechargeables à chaud (strategy.yaml)
+# =========================================
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    """
+    Snapshot immuable des paramètres de stratégie.
+
+    Une instance n'est jamais modifiée : un rechargement crée un nouvel objet
+    qui remplace l'ancien en une seule affectation, les handlers peuvent donc
+    le lire sans verrou.
+    """
+    # Écart minimal entre deux costumes miroirs pour déclencher une prédiction
+    diff_threshold: int = 10
+    # Nombre maximum de prédictions consécutives du même costume
+    max_consecutive: int = 3
+    # Durée de blocage après max_consecutive prédictions (minutes)
+    consecutive_block_minutes: int = 30
+    # Durée de blocage après 3 résultats (❌ ou 3 ✅) d'un costume (minutes)
+    result_block_minutes: int = 5
+    # Prédictions bloquées de H:blocked_from_minute à H:59 (60 = jamais bloqué)
+    blocked_from_minute: int = 40
+    # Heure du reset quotidien, dans le fuseau UTC+reset_utc_offset_hours
+    reset_hour: int = 0
+    reset_minute: int = 59
+    reset_utc_offset_hours: int = 1
+    # Source des compteurs: 'source2' (canal stats), 'local' (résultats Source 1) ou 'both'
+    stats_source: str = 'source2'
+    # Nombre de jeux Source 1 pris en compte par les compteurs locaux
+    local_stats_window: int = 100
+    # Compare les écarts Source 2 aux écarts locaux et journalise les divergences
+    stats_cross_check: bool = False
+    # Remise en ordre des résultats Source 1 : attente max d'un jeu manquant (s),
+    # écart max (en jeux) au-delà duquel on resynchronise au lieu de signaler des trous
+    reorder_hold_seconds: int = 10
+    reorder_max_gap: int = 20
+    # Mapping des costumes miroirs
+    suit_mapping: Mapping[str, str] = field(default_factory=lambda: MappingProxyType(dict(SUIT_MAPPING)))
+
+    @property
+    def mirror_pairs(self) -> list:
+        """Paires de costumes miroirs dérivées de suit_mapping, ex: [('♦', '♠'), ('♥', '♣')]."""
+        pairs = []
+        seen = set()
+        for suit, mirror in self.suit_mapping.items():
+            if suit not in seen:
+                pairs.append((suit, mirror))
+                seen.update((suit, mirror))
+        return pairs
+
+# Bornes (incluses) des paramètres entiers
+_INT_BOUNDS = {
+    'diff_threshold': (1, 1000),
+    'max_consecutive': (1, 100),
+    'consecutive_block_minutes': (0, 24 * 60),
+    'result_block_minutes': (0, 24 * 60),
+    'blocked_from_minute': (0, 60),
+    'reset_hour': (0, 23),
+    'reset_minute': (0, 59),
+    'reset_utc_offset_hours': (-12, 14),
+    'local_stats_window': (1, 10000),
+    'reorder_hold_seconds': (0, 600),
+    'reorder_max_gap': (1, 1000),
+}
+
+# Valeurs autorisées des paramètres texte
+_CHOICES = {
+    'stats_source': ('source2', 'local', 'both'),
+}
+
+_BOOLS = ('stats_cross_check',)
+
+def validate_strategy(data: dict) -> StrategyConfig:
+    """
+    Valide un dictionnaire (issu du YAML) et construit un StrategyConfig.
+
+    Les clés absentes gardent leur valeur par défaut.
+
+    Raises:
+        ValueError: clé inconnue, type ou valeur invalide
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Le fichier de stratégie doit contenir un dictionnaire")
+
+    known = {f.name for f in fields(StrategyConfig)}
+    unknown = set(data) - known
+    if unknown:
+        raise ValueError(f"Clés inconnues: {', '.join(sorted(unknown))}")
+
+    values = {}
+    for name, (low, high) in _INT_BOUNDS.items():
+        if name not in data:
+            continue
+        value = data[name]
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"{name} doit être un entier")
+        if not low <= value <= high:
+            raise ValueError(f"{name} doit être entre {low} et {high} (reçu {value})")
+        values[name] = value
+
+    for name, choices in _CHOICES.items():
+        if name in data:
+            if data[name] not in choices:
+                raise ValueError(f"{name} doit être parmi {', '.join(choices)} (reçu {data[name]!r})")
+            values[name] = data[name]
+
+    for name in _BOOLS:
+        if name in data:
+            if not isinstance(data[name], bool):
+                raise ValueError(f"{name} doit être true ou false")
+            values[name] = data[name]
+
+    if 'suit_mapping' in data:
+        mapping = data['suit_mapping']
+        if not isinstance(mapping, dict) or set(mapping) != set(ALL_SUITS):
+            raise ValueError(f"suit_mapping doit associer chacun des costumes {ALL_SUITS}")
+        for suit, mirror in mapping.items():
+            if mirror not in ALL_SUITS or mirror == suit:
+                raise ValueError(f"suit_mapping: miroir invalide pour {suit}: {mirror}")
+            if mapping[mirror] != suit:
+                raise ValueError(f"suit_mapping doit être symétrique ({suit}->{mirror} mais {mirror}->{mapping[mirror]})")
+        values['suit_mapping'] = MappingProxyType(dict(mapping))
+
+    return replace(StrategyConfig(), **values)
+
+def load_strategy(path: str) -> StrategyConfig:
+    """Charge et valide le fichier YAML. Fichier absent = valeurs par défaut."""
+    if not os.path.exists(path):
+        return StrategyConfig()
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    return validate_strategy(data or {})
@@ -0,0 +1,143 @@
+from config import ALL_SUITS
+
+# =========================================
+# Statistiques glissantes des costumes calculées localement (Source 1)
+# =========================================
+
+# Bit de chaque costume dans le masque d'un jeu (♠=1, ♥=2, ♦=4, ♣=8)
+SUIT_BITS = {suit: 1 << index for index, suit in enumerate(ALL_SUITS)}
+# Pour chaque masque possible (0-15), les index des costumes présents
+_MASK_INDEXES = tuple(
+    tuple(index for index in range(len(ALL_SUITS)) if mask & (1 << index))
+    for mask in range(1 << len(ALL_SUITS))
+)
+
+def suits_to_mask(suits) -> int:
+    """Convertit une liste de costumes normalisés en masque de bits."""
+    mask = 0
+    for suit in suits:
+        mask |= SUIT_BITS.get(suit, 0)
+    return mask
+
+class SuitStatsWindow:
+    """
+    Nombre de jeux contenant chaque costume sur les `size` derniers jeux.
+
+    Chaque jeu est stocké comme un masque de 4 bits dans un buffer circulaire
+    (bytearray). Ajouter un jeu retire le plus ancien : les compteurs et les
+    écarts entre miroirs sont mis à jour en O(1).
+    """
+
+    def __init__(self, size: int, pairs=()):
+        self.size = size
+        self.masks = bytearray(size)
+        self.position = 0
+        self.filled = 0
+        self.counts = [0] * len(ALL_SUITS)
+        self.last_game = None
+        self.set_mirror_pairs(pairs)
+
+    def set_mirror_pairs(self, pairs):
+        """
+        Définit les paires de miroirs suivies, ex: [('♦', '♠'), ('♥', '♣')].
+
+        Pour chaque masque possible, l'effet d'un jeu sur l'écart (s1 - s2) de chaque
+        paire est précalculé : push ajuste les écarts sans relire les compteurs.
+        """
+        self.pairs = tuple(tuple(pair) for pair in pairs)
+        indexes = [(ALL_SUITS.index(s1), ALL_SUITS.index(s2)) for s1, s2 in self.pairs]
+        self._pair_deltas = tuple(
+            tuple(((mask >> i1) & 1) - ((mask >> i2) & 1) for i1, i2 in indexes)
+            for mask in range(1 << len(ALL_SUITS))
+        )
+        self.diffs = [self.counts[i1] - self.counts[i2] for i1, i2 in indexes]
+
+    def push(self, game_number: int, suits) -> bool:
+        """
+        Ajoute le résultat d'un jeu.
+
+        Les résultats arrivent dans l'ordre (tampon de remise en ordre) : un numéro
+        inférieur ou égal au dernier compté est un doublon et est ignoré. Quand la
+        numérotation repart de plus bas, l'appelant vide la fenêtre (clear).
+
+        Returns:
+            bool: True si le jeu a été compté
+        """
+        if self.last_game is not None and game_number <= self.last_game:
+            return False
+
+        counts = self.counts
+        diffs = self.diffs
+        if self.filled == self.size:
+            old_mask = self.masks[self.position]
+            for index in _MASK_INDEXES[old_mask]:
+                counts[index] -= 1
+            for pair_index, delta in enumerate(self._pair_deltas[old_mask]):
+                diffs[pair_index] -= delta
+        else:
+            self.filled += 1
+
+        mask = suits_to_mask(suits)
+        for index in _MASK_INDEXES[mask]:
+            counts[index] += 1
+        for pair_index, delta in enumerate(self._pair_deltas[mask]):
+            diffs[pair_index] += delta
+
+        self.masks[self.position] = mask
+        self.position = (self.position + 1) % self.size
+        self.last_game = game_number
+        return True
+
+    def stats(self) -> dict:
+        """Compteurs par costume, au même format que parse_stats_message."""
+        return {suit: self.counts[index] for index, suit in enumerate(ALL_SUITS)}
+
+    def mirror_diffs(self) -> dict:
+        """Écart signé (s1 - s2) pour chaque paire de miroirs suivie, ex: {('♦', '♠'): -4}."""
+        return dict(zip(self.pairs, self.diffs))
+
+    def resized(self, size: int) -> 'SuitStatsWindow':
+        """Nouvelle fenêtre de taille `size` contenant les jeux les plus récents de celle-ci."""
+        window = SuitStatsWindow(size, self.pairs)
+        kept = min(self.filled, size)
+        for offset in range(kept, 0, -1):
+            mask = self.masks[(self.position - offset) % self.size]
+            window.masks[window.position] = mask
+            window.position = (window.position + 1) % size
+            for index in _MASK_INDEXES[mask]:
+                window.counts[index] += 1
+        window.filled = kept
+        window.last_game = self.last_game
+        window.set_mirror_pairs(self.pairs)
+        return window
+
+    def to_dict(self) -> dict:
+        """État sérialisable en JSON (réplication)."""
+        return {
+            'size': self.size,
+            'masks': self.masks.hex(),
+            'position': self.position,
+            'filled': self.filled,
+            'counts': list(self.counts),
+            'last_game': self.last_game,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, pairs=()) -> 'SuitStatsWindow':
+        window = cls(data['size'])
+        window.masks = bytearray.fromhex(data['masks'])
+        window.position = data['position']
+        window.filled = data['filled']
+        window.counts = list(data['counts'])
+        window.last_game = data['last_game']
+        window.set_mirror_pairs(pairs)
+        return window
+
+    def clear(self):
+        """Vide la fenêtre (reset quotidien)."""
+        self.masks = bytearray(self.size)
+        self.position = 0
+        self.filled = 0
+        self.counts = [0] * len(ALL_SUITS)
+        self.diffs = [0] * len(self.pairs)
+        self.last_game = None